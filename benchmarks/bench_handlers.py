@@ -0,0 +1,164 @@
+"""
+Headless benchmark of JesseLiveCLIApp.handle_message.
+
+Drives the Textual app through its test pilot with synthetic frames from
+jesselivecli.simulator and reports per-event handler latency (p50 / p99),
+per-pane render latency, messages and frames per second and RSS for each
+scenario. Handlers only mark panes dirty, so each tick ends with one
+render_dirty() call, the repaint the app's frame timer would do.
+
+    python benchmarks/bench_handlers.py --output bench_handlers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from jesselivecli import live_cli
+from jesselivecli.live_cli import JesseLiveCLIApp
+from jesselivecli.simulator import SimulatedSession, EXCHANGE
+
+SCENARIOS = {
+    # name: (ticks, symbols, orders, log_burst)
+    "baseline": (200, 4, 20, 10),
+    "large_orders": (100, 4, 1000, 10),
+    "many_symbols": (100, 200, 20, 10),
+    "long_logs": (100, 4, 20, 500),
+}
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class BenchApp(JesseLiveCLIApp):
+    CSS_PATH = os.path.join(os.path.dirname(live_cli.__file__), JesseLiveCLIApp.CSS_PATH)
+
+    async def start_client(self, server_config: str):
+        pass  # no websocket, frames are fed by run_scenario
+
+
+def timed(render, samples: List[float]):
+    def wrapper(data):
+        t0 = time.perf_counter()
+        try:
+            return render(data)
+        finally:
+            samples.append((time.perf_counter() - t0) * 1000)
+    return wrapper
+
+
+def summarize(latencies: Dict[str, List[float]]) -> Dict:
+    return {
+        name: {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "max_ms": round(max(values), 3),
+        }
+        for name, values in sorted(latencies.items()) if values
+    }
+
+
+def make_session(symbols: int, orders: int, log_burst: int) -> SimulatedSession:
+    names = [f"SYM{i}-USDT" for i in range(symbols)]
+    routes = [{"exchange": EXCHANGE, "symbol": names[0], "timeframe": "1m", "strategy": "Bench"}]
+    return SimulatedSession("bench-session", routes, names, orders, log_burst)
+
+
+async def run_scenario(name: str, ticks: int, symbols: int, orders: int, log_burst: int) -> Dict:
+    session = make_session(symbols, orders, log_burst)
+    frames = [session.next_frames() for _ in range(ticks)]
+
+    app = BenchApp()
+    app.init_config("", "", session.id)
+
+    latencies = defaultdict(list)
+    render_latencies = defaultdict(list)
+    frame_latencies = []
+    rss_before = rss_mb()
+    async with app.run_test(size=(200, 60)) as pilot:
+        await pilot.pause()
+        app.renderers = {pane: timed(render, render_latencies[pane]) for pane, render in app.renderers.items()}
+        started = time.perf_counter()
+        count = 0
+        for tick_frames in frames:
+            for frame in tick_frames:
+                event = json.loads(frame)["event"].split(".")[-1]
+                t0 = time.perf_counter()
+                await app.handle_message(frame)
+                latencies[event].append((time.perf_counter() - t0) * 1000)
+                count += 1
+            t0 = time.perf_counter()
+            app.render_dirty()
+            frame_latencies.append((time.perf_counter() - t0) * 1000)
+            await pilot.pause()  # let the screen repaint once per tick
+        elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "ticks": ticks,
+        "symbols": symbols,
+        "orders": orders,
+        "log_burst": log_burst,
+        "messages": count,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(count / elapsed, 1),
+        "frames_per_second": round(ticks / elapsed, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - rss_before, 1),
+        "handlers": summarize(latencies),
+        "render": summarize({"render_dirty": frame_latencies}),
+        "panes": summarize(render_latencies),
+    }
+
+
+async def main(names: List[str], output: str):
+    results = []
+    for name in names:
+        result = await run_scenario(name, *SCENARIOS[name])
+        results.append(result)
+        print(f"{name:>14}: {result['messages_per_second']:>9} msg/s {result['frames_per_second']:>7} fps "
+              f"rss {result['rss_mb']} MB")
+        for event, stats in result["handlers"].items():
+            print(f"{'':>16}{event:<16} p50 {stats['p50_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms")
+        for pane, stats in {**result["render"], **result["panes"]}.items():
+            print(f"{'':>16}{pane:<16} p50 {stats['p50_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms  (render)")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run, repeatable. Default: all")
+    parser.add_argument("--output", default="bench_handlers.json", help="JSON results file, empty to skip")
+    args = parser.parse_args()
+    os.makedirs("./logs", exist_ok=True)
+    asyncio.run(main(args.scenario or list(SCENARIOS), args.output))
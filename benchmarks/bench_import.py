@@ -0,0 +1,114 @@
+"""
+Import-time budget of the jesse-live-cli commands.
+
+For each command, starts a fresh interpreter `--runs` times importing the
+CLI and the modules that command loads before doing any work, and compares
+the median time (minus a bare interpreter start) with the command's budget.
+Exits with status 1 when a command is over budget or pulls in a module it
+must not, e.g. the Textual UI or Jesse for `stop`.
+
+    python benchmarks/bench_import.py --runs 10 --output bench_import.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# command: (modules the command imports when it runs, budget in ms)
+COMMANDS = {
+    "start": (["jesselivecli.api", "aiohttp"], 200),
+    "stop": (["jesselivecli.api", "aiohttp"], 200),
+    "restart": (["jesselivecli.api", "aiohttp"], 200),
+    "getinfo": (["jesselivecli.api", "aiohttp", "rich.console", "rich.table"], 300),
+    "search": (["jesselivecli.logsearch"], 200),
+}
+# Modules and packages none of the commands above may load
+FORBIDDEN = ("textual", "jesse", "websockets", "aioconsole", "arrow", "jesselivecli.live_cli", "jesselivecli.screens")
+
+
+def median(values: List[float]) -> float:
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def time_interpreter(code: str, runs: int) -> float:
+    """Median wall time in ms of `python -c code`."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return median(timings)
+
+
+def loaded_modules(modules: List[str]) -> List[str]:
+    code = ("import sys; from jesselivecli import cli\n"
+            + "".join(f"import {module}\n" for module in modules)
+            + "print('\\n'.join(sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return output.split()
+
+
+def slowest_imports(modules: List[str], count: int = 5) -> List[Dict]:
+    """Largest cumulative import times from python -X importtime."""
+    code = "from jesselivecli import cli\n" + "".join(f"import {module}\n" for module in modules)
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], check=True,
+                            capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append({"module": parts[2].strip(), "cumulative_ms": int(parts[1]) / 1000})
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:count]
+
+
+def main(args) -> int:
+    bare = time_interpreter("pass", args.runs)
+    results = []
+    failed = False
+    for command in args.command or list(COMMANDS):
+        modules, budget = COMMANDS[command]
+        if args.budget:
+            budget = args.budget
+        code = "from jesselivecli import cli\n" + "".join(f"import {module}\n" for module in modules)
+        elapsed = time_interpreter(code, args.runs) - bare
+        forbidden = sorted(
+            module for module in loaded_modules(modules)
+            if any(module == name or module.startswith(name + ".") for name in FORBIDDEN)
+        )
+        over = elapsed > budget or bool(forbidden)
+        failed = failed or over
+        results.append({
+            "command": command,
+            "import_ms": round(elapsed, 1),
+            "budget_ms": budget,
+            "forbidden_modules": forbidden,
+            "slowest_imports": slowest_imports(modules),
+            "ok": not over,
+        })
+        print(f"{command:>8}: {elapsed:7.1f} ms (budget {budget} ms) {'OK' if not over else 'OVER BUDGET'}")
+        if forbidden:
+            print(f"{'':>10}loads {', '.join(forbidden[:10])}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "interpreter_ms": round(bare, 1),
+                "results": results,
+            }, file, indent=2)
+        print(f"Results saved to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--command", action="append", choices=sorted(COMMANDS), help="Command to check, repeatable. Default: all")
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter starts per command, the median is used")
+    parser.add_argument("--budget", type=float, default=0, help="Budget in ms for every command, overrides the defaults")
+    parser.add_argument("--output", default="bench_import.json", help="JSON results file, empty to skip")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,241 @@
+"""
+Fan-out load test of `jesse-live-cli proxy`.
+
+Starts `jesse-live-cli simulate --stamp` as the upstream and a proxy in front
+of it, then for each step connects N websocket clients and measures
+end-to-end latency percentiles, dropped and lagging clients, and the proxy
+process CPU and memory. The first step over the latency budget, with dropped
+clients or with the proxy CPU pegged is reported as the saturation point.
+
+    python benchmarks/bench_proxy.py --clients 1,10,100,1000 --rate 10 --output bench_proxy.json
+
+All clients run in this process, so at the largest steps keep an eye on the
+harness' own CPU: if it is pegged the measured latency includes it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import websockets
+
+CLI = [sys.executable, "-c", "from jesselivecli import cli; cli()"]
+PASSWORD = "bench"
+SENT_AT = re.compile(r'"sent_at": ([0-9.]+)')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("localhost", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class ProcessStats:
+    """CPU seconds and RSS of a process, from /proc or psutil when available."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        try:
+            import psutil
+            self.process = psutil.Process(pid)
+        except ImportError:
+            self.process = None
+
+    def cpu_seconds(self) -> float:
+        if self.process is not None:
+            times = self.process.cpu_times()
+            return times.user + times.system
+        with open(f"/proc/{self.pid}/stat") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss_mb(self) -> float:
+        if self.process is not None:
+            return self.process.memory_info().rss / 1024 / 1024
+        with open(f"/proc/{self.pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+
+class BenchClient:
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.closed = False
+        self.measuring = False
+
+    async def run(self, url: str, ready: asyncio.Event):
+        try:
+            async with websockets.connect(url, max_queue=None) as websocket:
+                ready.set()
+                async for message in websocket:
+                    if not self.measuring:
+                        continue
+                    self.received += 1
+                    match = SENT_AT.search(message, 0, 64)
+                    if match:
+                        self.latencies.append(time.time() - float(match.group(1)))
+        except (websockets.ConnectionClosed, OSError):
+            pass
+        finally:
+            ready.set()
+            self.closed = True
+
+
+async def wait_for_traffic(url: str, timeout: float = 30):
+    """Wait until the proxy is connected upstream and forwarding frames."""
+    async with websockets.connect(url) as websocket:
+        await asyncio.wait_for(websocket.recv(), timeout)
+
+
+async def run_step(url: str, clients: int, duration: float, proxy: ProcessStats, latency_budget: float) -> Dict:
+    bench_clients = [BenchClient() for _ in range(clients)]
+    tasks = []
+    for client in bench_clients:
+        ready = asyncio.Event()
+        tasks.append(asyncio.create_task(client.run(url, ready)))
+        await ready.wait()
+    await asyncio.sleep(1.5)  # subscription grace period and warm up
+
+    for client in bench_clients:
+        client.measuring = True
+    cpu_start = proxy.cpu_seconds()
+    started = time.time()
+    await asyncio.sleep(duration)
+    elapsed = time.time() - started
+    cpu = (proxy.cpu_seconds() - cpu_start) / elapsed * 100
+    rss = proxy.rss_mb()
+    for client in bench_clients:
+        client.measuring = False
+    dropped = sum(1 for client in bench_clients if client.closed)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [latency for client in bench_clients for latency in client.latencies]
+    most = max((client.received for client in bench_clients), default=0)
+    lagging = sum(
+        1 for client in bench_clients
+        if client.received < most * 0.95 or percentile(client.latencies, 99) > latency_budget
+    )
+    return {
+        "clients": clients,
+        "seconds": round(elapsed, 2),
+        "messages_per_client": most,
+        "messages_per_second": round(sum(client.received for client in bench_clients) / elapsed, 1),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "latency_max_ms": round(max(latencies, default=0) * 1000, 2),
+        "dropped_clients": dropped,
+        "lagging_clients": lagging,
+        "proxy_cpu_percent": round(cpu, 1),
+        "proxy_rss_mb": round(rss, 1),
+    }
+
+
+def saturated(step: Dict, latency_budget: float) -> bool:
+    return (step["latency_p99_ms"] > latency_budget * 1000
+            or step["dropped_clients"] > 0
+            or step["proxy_cpu_percent"] >= 95)
+
+
+async def main(args) -> Optional[int]:
+    simulator_port = free_port()
+    proxy_port = free_port()
+    workdir = tempfile.mkdtemp(prefix="bench-proxy-")
+    server_config = os.path.join(workdir, "server.json")
+    with open(server_config, "w") as file:
+        json.dump({"server": {"host": "localhost", "port": simulator_port, "password": PASSWORD}}, file)
+
+    simulator = subprocess.Popen(CLI + [
+        "simulate", "--port", str(simulator_port), "--password", PASSWORD, "--stamp",
+        "--sessions", str(args.sessions), "--rate", str(args.rate), "--orders", str(args.orders),
+    ], stdout=subprocess.DEVNULL)
+    proxy = subprocess.Popen(CLI + [
+        "proxy", "--server_config", server_config, "--listen_port", str(proxy_port),
+        "--max_queue", str(args.max_queue), "--overflow", args.overflow,
+    ], stdout=subprocess.DEVNULL)
+
+    steps = []
+    saturation = None
+    try:
+        await wait_for_port(simulator_port)
+        await wait_for_port(proxy_port)
+        stats = ProcessStats(proxy.pid)
+        url = f"ws://localhost:{proxy_port}"
+        await wait_for_traffic(url)
+        for clients in args.clients:
+            step = await run_step(url, clients, args.duration, stats, args.latency_budget)
+            steps.append(step)
+            print(f"{clients:>5} clients: p50 {step['latency_p50_ms']:>8} ms  p99 {step['latency_p99_ms']:>8} ms  "
+                  f"dropped {step['dropped_clients']:>4}  lagging {step['lagging_clients']:>4}  "
+                  f"cpu {step['proxy_cpu_percent']:>5}%  rss {step['proxy_rss_mb']} MB")
+            if saturation is None and saturated(step, args.latency_budget):
+                saturation = clients
+    finally:
+        proxy.terminate()
+        simulator.terminate()
+        proxy.wait()
+        simulator.wait()
+
+    print(f"Saturation point: {saturation} clients" if saturation else "Saturation point not reached")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "sessions": args.sessions,
+                "rate": args.rate,
+                "orders": args.orders,
+                "max_queue": args.max_queue,
+                "overflow": args.overflow,
+                "latency_budget_ms": args.latency_budget * 1000,
+                "saturation_clients": saturation,
+                "steps": steps,
+            }, file, indent=2)
+        print(f"Results saved to {args.output}")
+    return saturation
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,10,100,1000", help="Comma separated client counts, one step each")
+    parser.add_argument("--sessions", type=int, default=2, help="Simulated sessions upstream")
+    parser.add_argument("--rate", type=float, default=10, help="Ticks per second per session")
+    parser.add_argument("--orders", type=int, default=20, help="Orders list size")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds per step")
+    parser.add_argument("--max_queue", type=int, default=1000, help="Proxy --max_queue")
+    parser.add_argument("--overflow", default="drop_oldest", help="Proxy --overflow")
+    parser.add_argument("--latency_budget", type=float, default=0.25, help="p99 latency budget in seconds")
+    parser.add_argument("--output", default="bench_proxy.json", help="JSON results file, empty to skip")
+    args = parser.parse_args()
+    args.clients = [int(n) for n in args.clients.split(",")]
+    asyncio.run(main(args))
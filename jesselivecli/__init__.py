@@ -1,33 +1,19 @@
+# Keep this module light: every subcommand imports what it needs when it runs,
+# so `stop` or `getinfo` never load the Textual UI, rich or Jesse itself.
 import asyncio
-import aioconsole
-from rich.prompt import Prompt
-import websockets
-import click
-
-from rich.layout import Layout
-from rich.live import Live
-from rich.console import Console
-from rich.table import Table
-from rich.columns import Columns
-from typing import List, Dict
-
-import time
 import json
-
 import os
-import jesse.helpers as jh
-import pathlib
-import yaml
-import arrow
-
-# from jesselivecli.live_cli_rich import run_live_cli
-from jesselivecli.live_cli import run_live_cli
-    
-from jesselivecli.utils import load_config, generate_ws_url
+import time
+from typing import List
+
+import click
+
 def validate_cwd() -> None:
     """
     make sure we're in a Jesse project
     """
+    import jesse.helpers as jh
+
     if not jh.is_jesse_project():
         print(
             jh.color(
@@ -37,13 +23,25 @@ def validate_cwd() -> None:
         )
         os._exit(1)
 
-from hashlib import sha256
-
 # create a Click group
 @click.group()
 # @click.version_option(pkg_resources.get_distribution("jesselivecli").version)
-def cli() -> None:
-    pass
+@click.option('--daemon_socket', required=False, type=str, default='', envvar='JESSE_LIVE_CLI_DAEMON',
+              help='Forward start / stop / restart / getinfo to the `jesse-live-cli daemon` listening on this socket.')
+@click.pass_context
+def cli(ctx: click.Context, daemon_socket: str) -> None:
+    ctx.obj = {'daemon_socket': daemon_socket}
+
+
+def in_daemon(ctx: click.Context, command: str, **args):
+    """Run a command in the control daemon, config paths must be absolute as its working directory may differ"""
+    from jesselivecli.daemon import DaemonError, send_command
+
+    socket_path = ctx.obj['daemon_socket']
+    try:
+        return asyncio.run(send_command(socket_path, command, args))
+    except (DaemonError, OSError) as e:
+        raise click.ClickException(f"Control daemon at {socket_path}: {e}")
 
 
 # print(os.path.dirname(jesse))
@@ -55,271 +53,229 @@ JESSE_DIR = os.path.dirname(os.path.realpath(__file__))
 #     cli = JesseLiveCLI(server_config, routes_config, default_id)
 #     await cli.run()
 
-async def start_jesse(server_config, routes_config):
-    import aiohttp
-
-    cfg = load_config(server_config)
-    
-    data = cfg["server"]
-    connection = generate_ws_url(data['host'], data['port'], data['password'])
-
-    host = f"http://{data['host']}:{data['port']}"
-    key = sha256(data['password'].encode('utf-8')).hexdigest()
-    headers = {
-            'Authorization': key,
-            'content-type': 'application/json'
-        }
-    exchange_api_keys = ""
-
-    routes = load_config(routes_config)
-    
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(f'{host}/active-workers', data="") as resp:
-            print("========== active-workers")
-            # print(resp.status)
-            print(await resp.text())
-            
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(f'{host}/exchange-api-keys', data="") as resp:
-            print("========== exchange-api-keys")
-            # print(resp.status)
-            respond = await resp.text()
-            print(respond)
-        exchange_api_keys = json.loads(respond)
-        # print(exchange_api_keys['data'][0]['id'])         
-            
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(f'{host}/notification-api-keys', data="") as resp:
-            print("========== notification-api-keys")
-            print(resp.status)
-            print(await resp.text())                   
-            
-    data = {}
-    data['id'] = routes["id"]
-
-    
-    data['routes']                  = routes['routes']
-    data['exchange']                = routes['exchange']
-    data['data_routes']             = routes['data_routes']
-    data['exchange_api_key_id']     = routes['exchange_api_key_id']
-    data['notification_api_key_id'] = routes['notification_api_key_id']
-    data['config']                  = cfg['config']
-    data['debug_mode']              = cfg['debug_mode']
-    data['paper_mode']              = cfg['paper_mode']
-    body = json.dumps(data)
-
-    print (f"Starting Jesse trading route {data['id']}")
-
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(f'{host}/live', data=body) as resp:
-            # print("==========")
-            print(resp.status)
-            # print(await resp.text())
-
-async def stop_jesse(server_config, routes_config):
-    import aiohttp
-
-    cfg = load_config(server_config)
-    data = cfg["server"]
-    connection = generate_ws_url(data['host'], data['port'], data['password'])
-
-    host = f"http://{data['host']}:{data['port']}"
-    key = sha256(data['password'].encode('utf-8')).hexdigest()
-    headers = {
-            'Authorization': key,
-            'content-type': 'application/json'
-        }
-
-    routes = load_config(routes_config)
-    data = {}
-    data['id'] = routes["id"]    
-    data['paper_mode'] = cfg['paper_mode']
-    body = json.dumps(data)
-    
-    print (f"Stopping Jesse trading route {data['id']}")
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(f'{host}/cancel-live', data=body) as resp:
-            print(resp.status)
-            # print(await resp.text())
-
-async def get_jesse_config(server_config, routes_config):
-    import aiohttp
-
-    cfg = load_config(server_config)
-    data = cfg["server"]
-    connection = generate_ws_url(data['host'], data['port'], data['password'])
-
-    host = f"http://{data['host']}:{data['port']}"
-    key = sha256(data['password'].encode('utf-8')).hexdigest()
-    headers = {
-            'Authorization': key,
-            'content-type': 'application/json'
-        }
-
-    routes = load_config(routes_config)
-    data = {}
-    data['id'] = 1
-    data['paper_mode'] = cfg['paper_mode']
-    body = json.dumps(data)
-    
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(f'{host}/get-config', data=body) as resp:
-            print(resp.status)
-            # print(await resp.text())
-
-
-async def shutdown_jesse(server_config, routes_config):
-    import aiohttp
-
-    cfg = load_config(server_config)
-    data = cfg["server"]
-    connection = generate_ws_url(data['host'], data['port'], data['password'])
-
-    host = f"http://{data['host']}:{data['port']}"
-    key = sha256(data['password'].encode('utf-8')).hexdigest()
-    headers = {
-            'Authorization': key,
-            'content-type': 'application/json'
-        }
-
-    routes = load_config(routes_config)
-    data = {}
-    data['id'] = 1
-    body = json.dumps(data)
-    
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(f'{host}/shutdown', data=body) as resp:
-            print(resp.status)
-            print(await resp.text())
-
-
-async def get_active_workers(server_config, routes_config):
-    import aiohttp
-
-    cfg = load_config(server_config)
-    data = cfg["server"]
-    connection = generate_ws_url(data['host'], data['port'], data['password'])
-
-    host = f"http://{data['host']}:{data['port']}"
-    key = sha256(data['password'].encode('utf-8')).hexdigest()
-    headers = {
-            'Authorization': key,
-            'content-type': 'application/json'
-        }
-    exchange_api_keys = ""
-
-    routes = load_config(routes_config)
-    
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.post(f'{host}/active-workers', data="") as resp:
-            print("========== active-workers")
-            print(resp.status)
-            print(await resp.text())
-            
-
-
 @cli.command()
 @click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
 @click.option('--routes_config', required=False, type=str, default='routes.yml', help='Routes configuration file in YAML / JSON format.')
 def shutdown(server_config: str, routes_config: str) -> None:
+    from jesselivecli.api import shutdown_jesse
     asyncio.run(shutdown_jesse(server_config, routes_config))
 
 @cli.command()
 @click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
 @click.option('--routes_config', required=False, type=str, default='routes.yml', help='Routes configuration file in YAML / JSON format.')
-def start(server_config: str, routes_config: str) -> None:
+@click.pass_context
+def start(ctx: click.Context, server_config: str, routes_config: str) -> None:
+    if ctx.obj['daemon_socket']:
+        in_daemon(ctx, 'start', server_config=os.path.abspath(server_config), routes_config=os.path.abspath(routes_config))
+        return
+    from jesselivecli.api import start_jesse
     asyncio.run(start_jesse(server_config, routes_config))
 
 @cli.command()
 @click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
 @click.option('--routes_config', required=False, type=str, default='routes.yml', help='Routes configuration file in YAML / JSON format.')
-def stop(server_config: str, routes_config: str) -> None:
+@click.pass_context
+def stop(ctx: click.Context, server_config: str, routes_config: str) -> None:
+    if ctx.obj['daemon_socket']:
+        in_daemon(ctx, 'stop', server_config=os.path.abspath(server_config), routes_config=os.path.abspath(routes_config))
+        return
+    from jesselivecli.api import stop_jesse
     asyncio.run(stop_jesse(server_config, routes_config))
 
 @cli.command()
 @click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
 @click.option('--routes_config', required=False, type=str, default='routes.yml', help='Routes configuration file in YAML / JSON format.')
-def restart(server_config: str, routes_config: str) -> None:
-    print("Restarting Jesse trading route")
-    asyncio.run(stop_jesse(server_config, routes_config))
-    time.sleep(2)
-    asyncio.run(start_jesse(server_config, routes_config))
+@click.option('--poll_interval', required=False, type=float, default=0.2, help='Seconds between checks that the route has stopped.')
+@click.option('--timeout', required=False, type=float, default=30, help='Give up if the route is still active after N seconds.')
+@click.pass_context
+def restart(ctx: click.Context, server_config: str, routes_config: str, poll_interval: float, timeout: float) -> None:
+    if ctx.obj['daemon_socket']:
+        in_daemon(ctx, 'restart', server_config=os.path.abspath(server_config), routes_config=os.path.abspath(routes_config),
+                  poll_interval=poll_interval, timeout=timeout)
+        return
+    from jesselivecli.api import restart_jesse
+    asyncio.run(restart_jesse(server_config, routes_config, poll_interval=poll_interval, timeout=timeout))
 
 
 
 @cli.command()
-@click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
+@click.option('--server_config', required=False, type=str, multiple=True, default=['server.yml'], help='Server configuration file in YAML / JSON format, repeat to query several servers.')
+@click.option('--server_dir', required=False, type=str, default='', help='Query every server config found in this directory instead.')
 @click.option('--routes_config', required=False, type=str, default='routes.yml', help='Routes configuration file in YAML / JSON format.')
-def getinfo(server_config: str, routes_config: str) -> None:
-    asyncio.run(get_active_workers(server_config, routes_config))
+@click.option('--timeout', required=False, type=float, default=5, help='Seconds to wait for each server.')
+@click.option('--json', 'as_json', is_flag=True, default=False, help='Print the results as JSON instead of a table.')
+@click.pass_context
+def getinfo(ctx: click.Context, server_config: List[str], server_dir: str, routes_config: str, timeout: float, as_json: bool) -> None:
+    """Show the active workers of one or more Jesse servers, queried concurrently."""
+    from jesselivecli.api import fleet_active_workers, list_server_configs
+
+    server_configs = list_server_configs(server_dir) if server_dir else list(server_config)
+    if ctx.obj['daemon_socket']:
+        results = in_daemon(ctx, 'getinfo', server_configs=[os.path.abspath(path) for path in server_configs], timeout=timeout)
+        for result, path in zip(results, server_configs):
+            result['config'] = path
+    else:
+        results = asyncio.run(fleet_active_workers(server_configs, timeout))
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Active workers")
+    table.add_column("Server")
+    table.add_column("Config")
+    table.add_column("Latency (ms)", justify="right")
+    table.add_column("Workers")
+    for result in results:
+        if result['error'] is not None:
+            workers = f"[red]{result['error']}"
+        else:
+            workers = "\n".join(result['workers']) or "[yellow]none"
+        table.add_row(result['name'], result['config'], str(result['latency_ms']), workers)
+    Console().print(table)
 
 
 @cli.command()
 @click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
 @click.option('--routes_config', required=False, type=str, default='routes.yml', help='Routes configuration file in YAML / JSON format.')
 @click.option('--default_id', required=False, type=str, default='', help='Listen to default id')
-def run(server_config: str, routes_config: str, default_id: str) -> None:
-    asyncio.new_event_loop().run_until_complete(run_live_cli(server_config, routes_config, default_id))
-
-
-async def start_proxy(server_config: str, listen_port: int):
-    cfg = load_config(server_config)
-    data = cfg["server"]
-    connection = generate_ws_url(data['host'], data['port'], data['password'])
-    # print(connection)
-    host = data['host'] + ":" + str(data['port'])
-
-    source_url = connection
-
-    connected_clients = set()
-    
-    async def forward_messages(websocket):
-        while True:
-            try:
-                print("Connecting ...")
-                async with websockets.connect(source_url) as source:
-                    print("Connected to server, Forwarding messages....")
-                    while True:
-                        message = await source.recv()
-                        await asyncio.gather(
-                            *(client.send(message) for client in connected_clients),
-                            return_exceptions=True
-                        )
-            except websockets.ConnectionClosed as e:
-                print(f"Connection closed: {e}. Attempting to reconnect in 5s...")
-                await asyncio.sleep(5)  # Wait for 5 seconds before retrying
-            except websockets.InvalidURI as e:
-                print(f"Invalid URI: {e}. Check the WebSocket URL.")
-                break  # Exit the loop if the URI is invalid
-            except websockets.InvalidHandshake as e:
-                print(f"Invalid handshake: {e}. Check the server configuration.")
-                break  # Exit the loop if the handshake fails
-            except Exception as e:
-                print(f"An unexpected error occurred: {e}. Retrying in 5s...")
-                await asyncio.sleep(5)  # Wait for 5 seconds before retrying
-
-    async def handle_client(websocket, path):
-        print("New client connected!")
-        connected_clients.add(websocket)
-        try:
-            await websocket.wait_closed()
-        finally:
-            connected_clients.remove(websocket)
-            print("Client disconnected!")
-            
-
-    server = await websockets.serve(handle_client, "localhost", listen_port)
-    forward_task = asyncio.create_task(forward_messages(None))
-
-    print(f"Proxy server started on port {listen_port}")
-    await server.wait_closed()
+@click.option('--subscribe/--no-subscribe', default=False, help='Only receive the selected session when connected to a jesse-live-cli proxy.')
+def run(server_config: str, routes_config: str, default_id: str, subscribe: bool) -> None:
+    # from jesselivecli.live_cli_rich import run_live_cli
+    from jesselivecli.live_cli import run_live_cli
+    asyncio.new_event_loop().run_until_complete(run_live_cli(server_config, routes_config, default_id, subscribe))
+
 
 # Add this to the cli group
 @cli.command()
-@click.option('--server_config', required=False, type=str, default='server.yml', help='Server configuration file in YAML / JSON format.')
+@click.option('--server_config', required=False, type=str, multiple=True, default=['server.yml'], help='Server configuration file in YAML / JSON format, repeat to aggregate several servers.')
 @click.option('--listen_port', required=True, type=int, help='Port to listen for client connections')
-def proxy(server_config: str,  listen_port: int):
-    asyncio.run(start_proxy(server_config, listen_port))
+@click.option('--max_queue', required=False, type=int, default=1000, help='Maximum number of frames queued for each client.')
+# proxy.OVERFLOW_POLICIES, spelled out so the CLI doesn't import the proxy and websockets up front
+@click.option('--overflow', required=False, type=click.Choice(['drop_oldest', 'disconnect', 'conflate']), default='drop_oldest', help='What to do when a client queue is full.')
+@click.option('--stats_interval', required=False, type=int, default=0, help='Print per-client lag counters every N seconds, 0 to disable.')
+@click.option('--cache/--no-cache', default=True, help='Send the latest session state to clients when they connect.')
+@click.option('--log_tail', required=False, type=int, default=100, help='Number of recent log events cached per session.')
+@click.option('--record_dir', required=False, type=str, default='', help='Also record every frame into this directory.')
+@click.option('--segment_minutes', required=False, type=int, default=60, help='Start a new recording segment every N minutes.')
+def proxy(server_config: List[str],  listen_port: int, max_queue: int, overflow: str, stats_interval: int, cache: bool, log_tail: int,
+          record_dir: str, segment_minutes: int):
+    from jesselivecli.proxy import start_proxy
+    from jesselivecli.recorder import FrameRecorder
+
+    recorder = FrameRecorder(record_dir, segment_minutes * 60) if record_dir else None
+    asyncio.run(start_proxy(server_config, listen_port, max_queue, overflow, stats_interval, cache, log_tail, recorder))
+
+@cli.command()
+@click.option('--server_config', required=False, type=str, multiple=True, default=['server.yml'], help='Server configuration file in YAML / JSON format, repeat to record several servers.')
+@click.option('--record_dir', required=False, type=str, default='recordings', help='Directory for the recorded segments.')
+@click.option('--segment_minutes', required=False, type=int, default=60, help='Start a new recording segment every N minutes.')
+@click.option('--block_seconds', required=False, type=int, default=60, help='Seek granularity of the index in seconds.')
+@click.option('--capture', required=False, type=str, default='', help='Write a plain JSON-lines capture to this file instead of segments.')
+def record(server_config: List[str], record_dir: str, segment_minutes: int, block_seconds: int, capture: str):
+    from jesselivecli.recorder import FrameRecorder, JsonLinesRecorder, record_stream
+
+    if capture:
+        recorder = JsonLinesRecorder(capture)
+    else:
+        recorder = FrameRecorder(record_dir, segment_minutes * 60, block_seconds)
+    asyncio.run(record_stream(server_config, recorder))
+
+@cli.command()
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--speed', required=False, type=float, default=1.0, help='Replay speed multiplier, 0 for as fast as possible.')
+@click.option('--start', required=False, type=str, default='', help='Seek to this time, epoch or local ISO date (2024-05-01 12:30).')
+@click.option('--default_id', required=False, type=str, default='', help='Listen to default id')
+def replay(source: str, speed: float, start: str, default_id: str) -> None:
+    """Replay a recording directory or JSON-lines capture into the TUI."""
+    from jesselivecli.live_cli import run_live_cli
+    from jesselivecli.utils import parse_timestamp
+
+    asyncio.new_event_loop().run_until_complete(
+        run_live_cli('', '', default_id, replay_source=source, replay_speed=speed,
+                     replay_start=parse_timestamp(start) if start else None))
+
+@cli.command()
+@click.option('--host', required=False, type=str, default='localhost', help='Host to listen on.')
+@click.option('--port', required=False, type=int, default=9000, help='Port to listen on.')
+@click.option('--password', required=False, type=str, default='test', help='Password clients must use, as in server.yml.')
+@click.option('--sessions', required=False, type=int, default=1, help='Number of sessions started on launch.')
+@click.option('--routes', required=False, type=int, default=2, help='Routes per generated session.')
+@click.option('--symbols', required=False, type=int, default=4, help='Candle symbols per session.')
+@click.option('--rate', required=False, type=float, default=1.0, help='Snapshot ticks per second per session.')
+@click.option('--orders', required=False, type=int, default=20, help='Size of the orders list.')
+@click.option('--log_burst', required=False, type=int, default=10, help='Log lines sent every 10 ticks.')
+@click.option('--stamp/--no-stamp', default=False, help='Add a "sent_at" time to every frame for latency measurements.')
+def simulate(host: str, port: int, password: str, sessions: int, routes: int, symbols: int, rate: float, orders: int, log_burst: int,
+             stamp: bool):
+    """Run a local Jesse stand-in serving synthetic sessions for load testing."""
+    from jesselivecli.simulator import JesseSimulator
+
+    simulator = JesseSimulator(password, routes, symbols, rate, orders, log_burst, stamp)
+    asyncio.run(simulator.serve(host, port, sessions))
+
+@cli.command()
+@click.option('--socket', 'socket_path', required=False, type=str, default='', help='Unix socket to listen on. Default: ~/.jesse-live-cli.sock')
+@click.option('--resync_seconds', required=False, type=float, default=30, help='Reload the sessions followed on the websocket from /active-workers this often.')
+@click.option('--watch/--no-watch', default=True, help='Answer getinfo from the live websocket state instead of /active-workers.')
+def daemon(socket_path: str, resync_seconds: float, watch: bool):
+    """Keep configs, connection pools and session state resident for fast start / stop / restart / getinfo."""
+    from jesselivecli.daemon import ControlDaemon, DaemonError, DEFAULT_SOCKET
+
+    control = ControlDaemon(socket_path or DEFAULT_SOCKET, resync_seconds, watch)
+    try:
+        asyncio.run(control.serve())
+    except DaemonError as e:
+        raise click.ClickException(str(e))
+    except KeyboardInterrupt:
+        pass
+
+@cli.command()
+@click.argument('query', required=False, default='')
+@click.option('--log_dir', required=False, type=str, default='./logs', help='Log directory to search, the index is kept in it.')
+@click.option('--level', required=False, type=click.Choice(['info', 'error']), default=None, help='Only lines of this level.')
+@click.option('--session', required=False, type=str, default='', help='Only lines of this session id.')
+@click.option('--since', required=False, type=str, default='', help='Only lines after this time, epoch or local ISO date (2024-05-01 12:30).')
+@click.option('--until', required=False, type=str, default='', help='Only lines before this time, epoch or local ISO date.')
+@click.option('--days', required=False, type=float, default=0, help='Only lines of the last N days.')
+@click.option('--limit', required=False, type=int, default=100, help='Maximum number of lines shown, newest first.')
+@click.option('--update/--no-update', default=True, help='Index the lines added since the last search first.')
+@click.option('--json', 'as_json', is_flag=True, default=False, help='Print the results as JSON lines.')
+def search(query: str, log_dir: str, level: str, session: str, since: str, until: str, days: float, limit: int,
+           update: bool, as_json: bool) -> None:
+    """
+    Search the logs through an incremental full-text index. Every word of QUERY must appear;
+    filters can also be written in it: 'level:error since:"2024-05-01 12:30" ETH-USDT'.
+    """
+    from datetime import datetime
+    from jesselivecli.logsearch import LogSearchIndex, parse_query, time_range
+
+    # the options win over the filters written in QUERY
+    text, filters = parse_query(query)
+    try:
+        since_ts, until_ts = time_range(since or filters.get('since'), until or filters.get('until'),
+                                        days or filters.get('days'))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--since' / '--until' / '--days'")
+    index = LogSearchIndex(log_dir)
+    started = time.perf_counter()
+    added = index.update() if update else 0
+    indexed = time.perf_counter()
+    results = index.search(text, level or filters.get('level'), session or filters.get('session'),
+                           since_ts, until_ts, limit)
+    searched = time.perf_counter()
+    index.close()
+    if as_json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    for result in reversed(results):
+        date = datetime.fromtimestamp(result['ts']).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{date} {(result['level'] or '-'):<5} {result['session'] or '-'} {result['message']}")
+    print(f"{len(results)} lines in {(searched - indexed) * 1000:.1f} ms"
+          + (f", {added} new lines indexed in {(indexed - started) * 1000:.0f} ms" if update else ""))
 
 if __name__ == "__main__":
     cli()
\ No newline at end of file
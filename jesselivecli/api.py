@@ -0,0 +1,325 @@
+import asyncio
+import json
+import os
+import time
+from hashlib import sha256
+from typing import Callable, Dict, List, Optional
+
+from jesselivecli.utils import cached_config
+
+# Every operation reports its progress through `echo`, print for the CLI,
+# the routes view for the TUI.
+Echo = Callable[[str], None]
+
+
+class JesseAPIError(Exception):
+    pass
+
+
+class JesseResponse:
+    """Status and body of a Jesse REST call."""
+
+    def __init__(self, status: int, text: str):
+        self.status = status
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.text)
+
+    @property
+    def data(self):
+        """The "data" field most Jesse endpoints wrap their result in."""
+        return self.json()['data']
+
+
+class JesseClient:
+    """
+    Async client of the Jesse REST API sharing one pool of keep-alive
+    connections between calls. Requests time out after `timeout` seconds;
+    failed connections are retried `retries` times with exponential backoff,
+    other failures only for calls that are safe to repeat.
+    """
+
+    def __init__(self, host: str, port, password: str, timeout: float = 10, retries: int = 3,
+                 backoff: float = 0.5, pool_size: int = 10, name: Optional[str] = None):
+        self.name = str(name or f"{host}:{port}")
+        self.url = f"http://{host}:{port}"
+        self.headers = {
+            'Authorization': sha256(password.encode('utf-8')).hexdigest(),
+            'content-type': 'application/json'
+        }
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.session = None
+
+    @classmethod
+    def from_config(cls, server_config: str, **kwargs) -> "JesseClient":
+        cfg = cached_config(server_config)
+        if cfg is None:
+            raise JesseAPIError(f"Can't load server config {server_config}")
+        data = cfg["server"]
+        kwargs.setdefault('name', data.get('name'))
+        return cls(data['host'], data['port'], data['password'], **kwargs)
+
+    async def __aenter__(self) -> "JesseClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def get_session(self):
+        import aiohttp
+
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None,
+                      idempotent: bool = True) -> JesseResponse:
+        import aiohttp
+
+        data = json.dumps(body) if body is not None else ""
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.get_session().request(method, self.url + path, data=data) as resp:
+                    return JesseResponse(resp.status, await resp.text())
+            except aiohttp.ClientConnectorError as e:
+                error = e  # nothing was sent, always safe to retry
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not idempotent:
+                    raise JesseAPIError(f"{method} {path} failed: {e}") from e
+                error = e
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        raise JesseAPIError(f"{method} {path} failed after {self.retries + 1} attempts: {error}")
+
+    async def active_workers(self) -> JesseResponse:
+        return await self.request('POST', '/active-workers')
+
+    async def exchange_api_keys(self) -> JesseResponse:
+        return await self.request('GET', '/exchange-api-keys')
+
+    async def notification_api_keys(self) -> JesseResponse:
+        return await self.request('GET', '/notification-api-keys')
+
+    async def start_live(self, body: Dict) -> JesseResponse:
+        return await self.request('POST', '/live', body, idempotent=False)
+
+    async def cancel_live(self, session_id: str, paper_mode: bool) -> JesseResponse:
+        return await self.request('POST', '/cancel-live', {'id': session_id, 'paper_mode': paper_mode})
+
+    async def get_config(self, paper_mode: bool) -> JesseResponse:
+        return await self.request('POST', '/get-config', {'id': 1, 'paper_mode': paper_mode})
+
+    async def shutdown(self) -> JesseResponse:
+        return await self.request('POST', '/shutdown', {'id': 1}, idempotent=False)
+
+    async def active_worker_ids(self) -> List[str]:
+        response = await self.active_workers()
+        if not response.ok:
+            raise JesseAPIError(f"/active-workers returned {response.status}: {response.text}")
+        return response.data
+
+
+def open_client(server_config: str, client: Optional[JesseClient]) -> JesseClient:
+    """The shared client when one is given, else a client for this call only."""
+    return client if client is not None else JesseClient.from_config(server_config)
+
+
+async def start_jesse(server_config, routes_config, echo: Echo = print,
+                      client: Optional[JesseClient] = None) -> Optional[int]:
+    """Start the live route of `routes_config`, return the HTTP status of /live."""
+    cfg = cached_config(server_config)
+    routes = cached_config(routes_config)
+    jesse = open_client(server_config, client)
+    try:
+        workers, exchange_keys, notification_keys = await asyncio.gather(
+            jesse.active_workers(), jesse.exchange_api_keys(), jesse.notification_api_keys())
+        echo("========== active-workers")
+        echo(workers.text)
+        echo("========== exchange-api-keys")
+        echo(exchange_keys.text)
+        echo("========== notification-api-keys")
+        echo(str(notification_keys.status))
+        echo(notification_keys.text)
+
+        data = {}
+        data['id'] = routes["id"]
+        data['routes']                  = routes['routes']
+        data['exchange']                = routes['exchange']
+        data['data_routes']             = routes['data_routes']
+        data['exchange_api_key_id']     = routes['exchange_api_key_id']
+        data['notification_api_key_id'] = routes['notification_api_key_id']
+        data['config']                  = cfg['config']
+        data['debug_mode']              = cfg['debug_mode']
+        data['paper_mode']              = cfg['paper_mode']
+
+        echo(f"Starting Jesse trading route {data['id']}")
+        response = await jesse.start_live(data)
+        echo(str(response.status))
+        return response.status
+    finally:
+        if client is None:
+            await jesse.close()
+
+
+async def stop_jesse(server_config, routes_config, echo: Echo = print,
+                     client: Optional[JesseClient] = None) -> Optional[int]:
+    """Stop the live route of `routes_config`, return the HTTP status of /cancel-live."""
+    cfg = cached_config(server_config)
+    routes = cached_config(routes_config)
+    jesse = open_client(server_config, client)
+    try:
+        echo(f"Stopping Jesse trading route {routes['id']}")
+        response = await jesse.cancel_live(routes['id'], cfg['paper_mode'])
+        echo(str(response.status))
+        return response.status
+    finally:
+        if client is None:
+            await jesse.close()
+
+
+async def wait_until_stopped(jesse: JesseClient, session_id: str, poll_interval: float = 0.2,
+                             timeout: float = 30) -> bool:
+    """
+    Poll /active-workers until `session_id` is gone, False if it is still there
+    after `timeout` seconds. A failed poll counts as "still there": the route is
+    already being stopped, so giving up early would leave it down.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        try:
+            if session_id not in await jesse.active_worker_ids():
+                return True
+        except JesseAPIError:
+            pass
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(poll_interval)
+
+
+async def restart_jesse(server_config, routes_config, echo: Echo = print,
+                        client: Optional[JesseClient] = None, poll_interval: float = 0.2,
+                        timeout: float = 30) -> Optional[int]:
+    """
+    Stop the route, wait until Jesse no longer lists it as an active worker
+    and start it again right away, reporting the measured downtime.
+    """
+    routes = cached_config(routes_config)
+    jesse = open_client(server_config, client)
+    loop = asyncio.get_running_loop()
+    try:
+        echo("Restarting Jesse trading route")
+        stopped_at = loop.time()
+        await stop_jesse(server_config, routes_config, echo, jesse)
+        if not await wait_until_stopped(jesse, routes['id'], poll_interval, timeout):
+            echo(f"Route {routes['id']} is still active (or /active-workers kept failing) after {timeout}s, "
+                 "not starting it again")
+            return None
+        echo(f"Route {routes['id']} stopped after {loop.time() - stopped_at:.2f}s")
+        status = await start_jesse(server_config, routes_config, echo, jesse)
+        echo(f"Downtime: {loop.time() - stopped_at:.2f}s")
+        return status
+    finally:
+        if client is None:
+            await jesse.close()
+
+
+async def get_jesse_config(server_config, routes_config, echo: Echo = print,
+                           client: Optional[JesseClient] = None) -> Optional[int]:
+    cfg = cached_config(server_config)
+    jesse = open_client(server_config, client)
+    try:
+        response = await jesse.get_config(cfg['paper_mode'])
+        echo(str(response.status))
+        return response.status
+    finally:
+        if client is None:
+            await jesse.close()
+
+
+async def shutdown_jesse(server_config, routes_config, echo: Echo = print,
+                         client: Optional[JesseClient] = None) -> Optional[int]:
+    jesse = open_client(server_config, client)
+    try:
+        response = await jesse.shutdown()
+        echo(str(response.status))
+        echo(response.text)
+        return response.status
+    finally:
+        if client is None:
+            await jesse.close()
+
+
+async def get_active_workers(server_config, routes_config, echo: Echo = print,
+                             client: Optional[JesseClient] = None) -> Optional[int]:
+    jesse = open_client(server_config, client)
+    try:
+        response = await jesse.active_workers()
+        echo("========== active-workers")
+        echo(str(response.status))
+        echo(response.text)
+        return response.status
+    finally:
+        if client is None:
+            await jesse.close()
+
+
+def list_server_configs(directory: str) -> List[str]:
+    """YAML / JSON files of a directory that hold a "server" section."""
+    configs = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(('.yml', '.yaml', '.json')) and os.path.isfile(path):
+            cfg = cached_config(path)
+            if isinstance(cfg, dict) and isinstance(cfg.get('server'), dict):
+                configs.append(path)
+    return configs
+
+
+async def fleet_active_workers(server_configs: List[str], timeout: float = 5,
+                               client_for: Optional[Callable[[str], JesseClient]] = None) -> List[Dict]:
+    """
+    Query /active-workers of every server at once, each bounded by `timeout`
+    seconds. Returns one dict per server with its name, config file, active
+    workers (None on failure), error and latency in milliseconds. Pooled
+    clients are taken from `client_for` when given and left open.
+    """
+    async def query(server_config: str) -> Dict:
+        result = {'name': server_config, 'config': server_config, 'workers': None, 'error': None, 'latency_ms': None}
+        started = time.perf_counter()
+        client = None
+        try:
+            if client_for is not None:
+                client = client_for(server_config)
+            else:
+                client = JesseClient.from_config(server_config, timeout=timeout, retries=0)
+            result['name'] = client.name
+            result['workers'] = await asyncio.wait_for(client.active_worker_ids(), timeout)
+        except asyncio.TimeoutError:
+            result['error'] = f"timed out after {timeout}s"
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+        finally:
+            if client is not None and client_for is None:
+                await client.close()
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    return list(await asyncio.gather(*(query(server_config) for server_config in server_configs)))
@@ -11,7 +11,13 @@ def get_default_config():
             'DEFAULT_SERVER_CONFIG': os.getenv('DEFAULT_SERVER_CONFIG', 'server.json'),
             'DEFAULT_EXCHANGE': os.getenv('DEFAULT_EXCHANGE', 'Binance Perpetual Futures'),
             'DEFAULT_EXCHANGE_API_KEY_ID': os.getenv('DEFAULT_EXCHANGE_API_KEY_ID', 'exchange_api_key_id'),
-            'DEFAULT_NOTIFICATION_API_KEY_ID': os.getenv('DEFAULT_NOTIFICATION_API_KEY_ID', 'notification_api_key_id')
+            'DEFAULT_NOTIFICATION_API_KEY_ID': os.getenv('DEFAULT_NOTIFICATION_API_KEY_ID', 'notification_api_key_id'),
+            'DEFAULT_LOG_LINES': int(os.getenv('DEFAULT_LOG_LINES', '1000')),
+            'DEFAULT_MAX_FPS': float(os.getenv('DEFAULT_MAX_FPS', '30')),
+            'DEFAULT_SESSION_BYTES': int(os.getenv('DEFAULT_SESSION_BYTES', str(4 * 1024 * 1024))),
+            'DEFAULT_LOG_MAX_BYTES': int(os.getenv('DEFAULT_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            'DEFAULT_LOG_ROTATE_SECONDS': int(os.getenv('DEFAULT_LOG_ROTATE_SECONDS', '86400')),
+            'DEFAULT_LOG_BACKUPS': int(os.getenv('DEFAULT_LOG_BACKUPS', '30'))
         }
     return DEFAULT_CONFIG
 
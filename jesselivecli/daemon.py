@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, List
+
+# Thin clients only need send_command: keep the imports of this module light,
+# the REST client and websockets are loaded by the daemon itself.
+DEFAULT_SOCKET = os.path.expanduser("~/.jesse-live-cli.sock")
+
+
+class DaemonError(Exception):
+    pass
+
+
+class SessionWatcher:
+    """
+    Keeps the active sessions of one Jesse server in memory, so getinfo can
+    answer without asking /active-workers. The set is loaded from
+    /active-workers when the websocket connects and every `resync_seconds`,
+    and kept current in between by the stream: a session is added by any of
+    its frames and removed by its termination.
+    """
+
+    def __init__(self, name: str, url: str, client, resync_seconds: float = 30):
+        self.name = name
+        self.url = url
+        self.client = client
+        self.resync_seconds = resync_seconds
+        self.sessions = set()
+        # stream changes seen while a resync waits for /active-workers, None when none runs
+        self.changes = None
+        self.synced = False
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        import websockets
+
+        while True:
+            try:
+                async with websockets.connect(self.url) as source:
+                    print(f"[{self.name}] Watching sessions")
+                    sync_task = asyncio.create_task(self.keep_synced())
+                    try:
+                        async for message in source:
+                            self.observe(message)
+                    finally:
+                        sync_task.cancel()
+            except Exception as e:
+                print(f"[{self.name}] Websocket error: {e}. Reconnecting in 5s...")
+            self.synced = False
+            self.sessions = set()
+            self.changes = None
+            await asyncio.sleep(5)
+
+    def observe(self, message: str) -> None:
+        from jesselivecli.proxy import frame_key
+
+        key = frame_key(message)
+        if key is None or not key[0]:
+            return
+        active = key[1] not in ('termination', 'unexpectedTermination')
+        if active:
+            self.sessions.add(key[0])
+        else:
+            self.sessions.discard(key[0])
+        if self.changes is not None:
+            self.changes[key[0]] = active
+
+    async def resync(self) -> None:
+        """Reload the sessions from /active-workers, keeping what the stream reported meanwhile."""
+        self.changes = {}
+        try:
+            sessions = set(await self.client.active_worker_ids())
+            for session_id, active in self.changes.items():
+                if active:
+                    sessions.add(session_id)
+                else:
+                    sessions.discard(session_id)
+        finally:
+            self.changes = None
+        self.sessions = sessions
+        self.synced = True
+
+    async def keep_synced(self):
+        while True:
+            try:
+                await self.resync()
+            except Exception as e:
+                print(f"[{self.name}] Can't load the active workers: {e}")
+            await asyncio.sleep(self.resync_seconds)
+
+    @property
+    def ready(self) -> bool:
+        """Connected and loaded from /active-workers at least once."""
+        return self.synced
+
+    def active_sessions(self) -> List[str]:
+        return sorted(self.sessions)
+
+
+class ControlDaemon:
+    """
+    Resident process serving start / stop / restart / getinfo on a Unix
+    socket. Parsed configs, one pooled JesseClient and one SessionWatcher per
+    Jesse server are kept between commands.
+
+    A request is one JSON line {"command": ..., "args": {...}}; the daemon
+    answers with {"echo": ...} progress lines and a final {"result": ...}
+    or {"error": ...} line.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, resync_seconds: float = 30, watch: bool = True):
+        self.socket_path = socket_path
+        self.resync_seconds = resync_seconds
+        self.watch = watch
+        self.clients = {}
+        self.watchers = {}
+
+    def server_key(self, server_config: str):
+        from jesselivecli.utils import cached_config
+
+        cfg = cached_config(server_config)
+        if cfg is None:
+            raise DaemonError(f"Can't load server config {server_config}")
+        data = cfg['server']
+        return data['host'], data['port'], data['password'], data.get('name')
+
+    def client(self, server_config: str):
+        """Pooled client of the server a config points to, shared by configs of the same server."""
+        from jesselivecli.api import JesseClient
+
+        key = self.server_key(server_config)
+        if key not in self.clients:
+            host, port, password, name = key
+            self.clients[key] = JesseClient(host, port, password, name=name)
+        return self.clients[key]
+
+    def watcher(self, server_config: str) -> SessionWatcher:
+        from jesselivecli.utils import generate_ws_url
+
+        key = self.server_key(server_config)
+        if key not in self.watchers:
+            host, port, password, name = key
+            watcher = SessionWatcher(name or f"{host}:{port}", generate_ws_url(host, port, password),
+                                     self.client(server_config), self.resync_seconds)
+            watcher.start()
+            self.watchers[key] = watcher
+        return self.watchers[key]
+
+    async def getinfo(self, server_configs: List[str], timeout: float = 5) -> List[Dict]:
+        """Active workers per server, from the websocket state when it is known, else from /active-workers."""
+        from jesselivecli.api import fleet_active_workers
+
+        results = {}
+        remote = []
+        for server_config in server_configs:
+            watcher = None
+            if self.watch:
+                try:
+                    watcher = self.watcher(server_config)
+                except Exception:
+                    pass  # the REST query reports the config error
+            if watcher is not None and watcher.ready:
+                results[server_config] = {
+                    'name': watcher.name,
+                    'config': server_config,
+                    'workers': watcher.active_sessions(),
+                    'error': None,
+                    'latency_ms': 0.0,
+                    'source': 'live',
+                }
+            else:
+                remote.append(server_config)
+        for result in await fleet_active_workers(remote, timeout, self.client):
+            result['source'] = 'rest'
+            results[result['config']] = result
+        return [results[server_config] for server_config in server_configs]
+
+    async def execute(self, command: str, args: Dict, echo: Callable[[str], None]):
+        from jesselivecli.api import start_jesse, stop_jesse, restart_jesse
+
+        if command == 'ping':
+            return 'pong'
+        if command == 'getinfo':
+            return await self.getinfo(args['server_configs'], args.get('timeout', 5))
+        if command in ('start', 'stop'):
+            action = start_jesse if command == 'start' else stop_jesse
+            return await action(args['server_config'], args['routes_config'], echo, self.client(args['server_config']))
+        if command == 'restart':
+            return await restart_jesse(args['server_config'], args['routes_config'], echo,
+                                       self.client(args['server_config']),
+                                       args.get('poll_interval', 0.2), args.get('timeout', 30))
+        raise DaemonError(f"Unknown command {command}")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def send(reply: Dict) -> None:
+            writer.write((json.dumps(reply) + "\n").encode('utf-8'))
+
+        line = await reader.readline()
+        if not line:
+            writer.close()  # a connection probe
+            return
+        try:
+            request = json.loads(line)
+            started = time.perf_counter()
+            result = await self.execute(request.get('command'), request.get('args') or {},
+                                        lambda line: send({"echo": str(line)}))
+            print(f"{request.get('command')} done in {(time.perf_counter() - started) * 1000:.1f} ms")
+            send({"result": result})
+        except Exception as e:
+            send({"error": str(e) or type(e).__name__})
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client went away
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.socket_path)
+                writer.close()
+                raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+            except OSError:
+                os.unlink(self.socket_path)  # left over by a daemon that died
+
+        server = await asyncio.start_unix_server(self.handle_connection, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        print(f"Control daemon listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for watcher in self.watchers.values():
+                watcher.task.cancel()
+            for client in self.clients.values():
+                await client.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+async def send_command(socket_path: str, command: str, args: Dict, echo: Callable[[str], None] = print):
+    """Run a command in the daemon listening on `socket_path`, echoing its progress, and return its result."""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write((json.dumps({"command": command, "args": args}) + "\n").encode('utf-8'))
+        await writer.drain()
+        async for line in reader:
+            reply = json.loads(line)
+            if 'echo' in reply:
+                echo(reply['echo'])
+            elif 'error' in reply:
+                raise DaemonError(reply['error'])
+            else:
+                return reply.get('result')
+    finally:
+        writer.close()
+    raise DaemonError("The daemon closed the connection without a result")
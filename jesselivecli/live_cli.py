@@ -12,18 +12,15 @@ from rich.text import Text
 import sys
 import asyncio
 import json
+import logging
 import websockets
 from typing import List, Dict, Optional
-from jesselivecli.utils import load_config, timestamp_to_date, generate_ws_url
-from rich.logging import RichHandler
-import logging
+from jesselivecli.utils import load_config, timestamp_to_date, get_timestamp_formatter, generate_ws_url, LogBuffer, loads, peek_envelope
 import os
-from datetime import datetime
 from textual.binding import Binding
 
 from pathlib import Path
 from typing import Iterable
-import subprocess
 import re
 
 import os
@@ -31,6 +28,9 @@ from dotenv import load_dotenv
 
 
 from jesselivecli.config import get_default_config
+from jesselivecli.proxy import SessionCache, SNAPSHOT_EVENTS
+from jesselivecli.api import JesseClient, start_jesse, stop_jesse, restart_jesse
+from jesselivecli.logwriter import LogWriter, SessionLogger
 
 # Import screen classes from screens.py
 from jesselivecli.screens import (
@@ -40,6 +40,8 @@ from jesselivecli.screens import (
     BacktestScreen,
     OptimizationScreen,
     LogScreen,
+    LogPane,
+    KeyedTable,
     ButtonActivatedMessage,
     RouteSelectMessage,
     SessionSelectMessage,
@@ -52,6 +54,9 @@ from jesselivecli.screens import (
     
 )
 
+def styled_cell(value) -> Text:
+    return Text(str(value), style="bold #03AC13", justify="left")
+
 # Custom Header class with horizontal buttons
 class CustomHeader(Container):
     def compose(self) -> ComposeResult:
@@ -106,8 +111,7 @@ class JesseLiveCLIApp(App):
     command_queue = asyncio.Queue()
     messages = Reactive(None)
     id_list = Reactive([])
-    log_info = Reactive("")
-    log_error = Reactive("")
+    log_buffer = None
 
     id_index = 0
     start_time = 0
@@ -117,11 +121,19 @@ class JesseLiveCLIApp(App):
     server_config = ""
     routes_config = ""
     default_id = ""
+    log_writer = None
+    log_path = None
     exchange_api_key_id = ""
     notification_api_key_id = ""
     routes_info = None
     exchange_info = None
     mode = "home"
+    subscribe_only = False
+    route_action_running = None
+    replay_source = None
+    replay_speed = 1.0
+    replay_start = None
+    replay_summary = ""
     
     def reset_config(self):
         self.exchange_info = None
@@ -130,10 +142,27 @@ class JesseLiveCLIApp(App):
         self.notification_api_key_id = ""
         
 
-    def init_config(self, server_config, routes_config, default_id):
+    def init_config(self, server_config, routes_config, default_id, subscribe_only=False):
         self.server_config = server_config
         self.routes_config = routes_config
         self.default_id = default_id
+        self.subscribe_only = subscribe_only
+        self.jesse_clients = {}
+        self.log_buffer = LogBuffer(get_default_config()['DEFAULT_LOG_LINES'])
+        # latest raw frames of every session, so switching sessions repaints from memory
+        self.session_store = SessionCache(get_default_config()['DEFAULT_LOG_LINES'],
+                                          get_default_config()['DEFAULT_SESSION_BYTES'])
+        self.render_state = {}
+        self.dirty_panes = set()
+        # repaint order of the panes
+        self.renderers = {
+            'general_info': self.render_general_info,
+            'current_candles': self.handle_candles,
+            'positions': self.handle_positions,
+            'orders': self.handle_orders,
+            'watch_list': self.handle_watch_list,
+            'log': self.render_log,
+        }
         
         self.handle_info_log("Hi there")
 
@@ -145,29 +174,36 @@ class JesseLiveCLIApp(App):
             if self.exchange_info != self.id_list[_id]:
                 need_reset = True
                 
+            switched = self.default_id != self.id_list[_id]
             self.default_id = self.id_list[_id]
             self.id_index = _id
             if need_reset:
                 self.reset_config()
+            if switched:
+                self.restore_session()
+            self.update_subscription()
             self.query_one("#session-id", Label).update(f"Session id {_id + 1}/{_len}: {self.default_id }")
             
 
     def setup_logger(self):
-        # Create logs directory if it doesn't exist
-        os.makedirs("./logs", exist_ok=True)
-        
-        # Generate log file name
-        start_time = datetime.now().strftime("%Y%m%d%H%M%S")
-        log_file = f"./logs/{start_time}.txt"
-        
-        # Set up logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(message)s",
-            datefmt="[%X]",
-            handlers=[RichHandler(), logging.FileHandler(log_file)]
+        if self.replay_source:
+            # replayed frames, stamped with the current time, must not end up in the live session logs
+            logger = logging.getLogger("jesselivecli.replay")
+            logger.propagate = False
+            logger.handlers = [logging.NullHandler()]
+            self.logger = SessionLogger(logger, lambda: self.default_id)
+            return
+        # Files are written by a background thread: ./logs/<session id>/log.txt and log.jsonl,
+        # rotated by size and by day, rotated files gzipped
+        default_config = get_default_config()
+        self.log_writer = LogWriter(
+            "./logs",
+            max_bytes=default_config['DEFAULT_LOG_MAX_BYTES'],
+            interval=default_config['DEFAULT_LOG_ROTATE_SECONDS'],
+            backup_count=default_config['DEFAULT_LOG_BACKUPS'],
         )
-        self.logger = logging.getLogger("rich")       
+        self.log_writer.start()
+        self.logger = SessionLogger(self.log_writer.logger("jesselivecli"), lambda: self.default_id)
 
     def compose(self) -> ComposeResult:
         yield CustomHeader()
@@ -175,50 +211,41 @@ class JesseLiveCLIApp(App):
 
     async def on_mount(self) -> None:
         self.switch_mode("home")
+        self.set_interval(1 / get_default_config()['DEFAULT_MAX_FPS'], self.render_dirty)
         
+    def init_replay(self, source: str, speed: float = 1.0, start: float = None):
+        self.replay_source = source
+        self.replay_speed = speed
+        self.replay_start = start
+
     async def on_load(self):
         self.setup_logger()
-                
-        self.websocket_task = asyncio.create_task(self.start_client(self.server_config))
+
+        if self.replay_source:
+            self.websocket_task = asyncio.create_task(self.start_replay())
+        else:
+            self.websocket_task = asyncio.create_task(self.start_client(self.server_config))
         # self.start_client("server.yml")
         
 
+    def jesse_client(self, server_config: str) -> JesseClient:
+        """Pooled REST client of a server config, shared by every call made from the TUI"""
+        if server_config not in self.jesse_clients:
+            self.jesse_clients[server_config] = JesseClient.from_config(server_config)
+        return self.jesse_clients[server_config]
+
+    async def close_clients(self):
+        for client in self.jesse_clients.values():
+            await client.close()
+        self.jesse_clients = {}
+
     async def get_active_workers(self, server_config: str = None):
+        if server_config is None:
+            server_config = self.server_config
         try:
-            import aiohttp        
-            from hashlib import sha256    
-            
-            if server_config is None:
-                server_config = self.server_config
-            cfg = load_config(server_config)
-
-            data = cfg["server"]
-            connection = generate_ws_url(data['host'], data['port'], data['password'])
-
-            host = f"http://{data['host']}:{data['port']}"
-            key = sha256(data['password'].encode('utf-8')).hexdigest()
-            headers = {
-                    'Authorization': key,
-                    'content-type': 'application/json'
-            }        
-            
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.post(f'{host}/active-workers', data="") as resp:
-                    try:
-                        ret_data = await resp.text()
-                        workers = json.loads(ret_data)['data']
-                    except aiohttp.ClientError as e:
-                        self.logger.error(f"Failed to fetch active workers: {e}")
-                        return None
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"Failed to decode JSON response: {e}")
-                        return None
-                    except Exception as e:
-                        self.logger.error(f"An unexpected error occurred: {e}")
-                        return None
-                    return workers
+            return await self.jesse_client(server_config).active_worker_ids()
         except Exception as e:
-            self.logger.error(f"An unexpected error occurred: {e}")
+            self.logger.error(f"Failed to fetch active workers: {e}")
             return None
     
     async def on_route_select_message(self, message: RouteSelectMessage) -> None:
@@ -276,88 +303,82 @@ class JesseLiveCLIApp(App):
 
             
     def restart_route(self):
-        server_config = self.query_one("#server-config", Input).value
-        route_file = self.query_one("#route-config", Input).value
+        self.run_route_action("Restart", restart_jesse)
 
-        self.info_log(f"Restarting : {server_config} {route_file}")
-
-        output = subprocess.run(["jesse-live-cli" ,"restart", "--server_config", server_config, "--routes_config", route_file], capture_output=True, text = True)
-        
-        code_view = self.query_one("#route-code", Static)
-        try:
-            syntax = Syntax(str(output.stdout),
-                    line_numbers=True,
-                    word_wrap=True,
-                    indent_guides=True,
-                    theme="github-dark",
-                    lexer="text")            
-        except Exception:
-            code_view.update(Traceback(theme="github-dark", width=None))
-            self.sub_title = "ERROR"
-        else:
-            code_view.update(syntax)        
-        self.info_log(f"Restarted with return code {output.returncode}")
-        if output.returncode == 0:
-            self.switch_mode("home")    
+    def stop_route(self):
+        self.run_route_action("Stop", stop_jesse)
 
+    def start_route(self):
+        self.run_route_action("Start", start_jesse)
 
-    def stop_route(self):
+    def run_route_action(self, verb: str, action) -> None:
+        """Run a Jesse REST operation as a task on the app's loop, the UI stays responsive"""
+        if self.route_action_running:
+            self.info_log(f"{verb} ignored, {self.route_action_running} is still running")
+            return
         server_config = self.query_one("#server-config", Input).value
         route_file = self.query_one("#route-config", Input).value
+        self.info_log(f"{verb}: {server_config} {route_file}")
+        # one action at a time: a restart cut short after its stop would leave the route down
+        self.route_action_running = verb
+        buttons = list(self.query("#button-view Button"))
+        for button in buttons:
+            button.disabled = True
+        self.route_action(verb, action, server_config, route_file, buttons)
+
+    @work(group="route-action")
+    async def route_action(self, verb: str, action, server_config: str, route_file: str, buttons: List[Button]) -> None:
+        output = []
+
+        def echo(line) -> None:
+            output.append(str(line))
+            self.show_route_output("\n".join(output))
 
-        self.info_log(f"Stopping : {server_config} {route_file}")
+        try:
+            status = await action(server_config, route_file, echo, self.jesse_client(server_config))
+        except asyncio.CancelledError:
+            echo(f"{verb} cancelled, check the route state with getinfo")
+            raise
+        except Exception as e:
+            echo(f"Error: {e}")
+            status = None
+        finally:
+            self.route_action_running = None
+            for button in buttons:
+                button.disabled = False
+        succeeded = status is not None and 200 <= status < 300
+        self.info_log(f"{verb} {'succeeded' if succeeded else 'failed'} with status {status}")
+        if succeeded and verb != "Stop":
+            self.switch_mode("home")
 
-        output = subprocess.run(["jesse-live-cli" ,"stop", "--server_config", server_config, "--routes_config", route_file], capture_output=True, text = True)
-        
-        code_view = self.query_one("#route-code", Static)
+    def show_route_output(self, text: str) -> None:
         try:
-            syntax = Syntax(str(output.stdout),
-                    line_numbers=True,
-                    word_wrap=True,
-                    indent_guides=True,
-                    theme="github-dark",
-                    lexer="text")            
+            code_view = self.query_one("#route-code", Static)
         except Exception:
-            code_view.update(Traceback(theme="github-dark", width=None))
-            self.sub_title = "ERROR"
-        else:
-            code_view.update(syntax)        
-        self.info_log(f"Stopped with return code {output.returncode}")
-      
-
-    def start_route(self):
-        server_config = self.query_one("#server-config", Input).value
-        route_file = self.query_one("#route-config", Input).value
-
-        self.info_log(f"Starting : {server_config} {route_file}")
-
-        output = subprocess.run(["jesse-live-cli" ,"start", "--server_config", server_config, "--routes_config", route_file], capture_output=True, text = True)
-        
-        code_view = self.query_one("#route-code", Static)
+            return  # the routes screen is not shown anymore
         try:
-            syntax = Syntax(str(output.stdout),
+            syntax = Syntax(text,
                     line_numbers=True,
                     word_wrap=True,
                     indent_guides=True,
                     theme="github-dark",
-                    lexer="text")            
+                    lexer="text")
         except Exception:
             code_view.update(Traceback(theme="github-dark", width=None))
             self.sub_title = "ERROR"
         else:
-            code_view.update(syntax)        
-        self.info_log(f"Started with return code {output.returncode}")
-        if output.returncode == 0:
-            self.switch_mode("home")        
+            code_view.update(syntax)
 
-                
-    
     async def handle_message(self, message):
         try:
-            # Process incoming messages and update state
-            data = json.loads(message)
-            id = data['id']
+            # Read the envelope first, the body is only decoded for frames this view shows
+            id, event_name = peek_envelope(message)
+            event_info = event_name.split(".")
+            event = event_info[1] if len(event_info) == 2 else ""
+            event_trading_mode = event_info[0] if len(event_info) == 2 else ""
+
             if len(id) > 0:
+                self.session_store.update(message, (id, event))
                 if self.default_id == "":                
                     self.default_id = id
                     self.action_change_session(str(self.id_index))
@@ -374,15 +395,16 @@ class JesseLiveCLIApp(App):
                     self.action_change_session(str(self.id_index))
                     # self.BINDINGS.append(("{len_id}", "change_session('{len_id}')", f"Session {len_id}"))
                 
-            event_info = data['event'].split(".")
-            event = event_info[1] if len(event_info) == 2 else ""
-            event_trading_mode = event_info[0] if len(event_info) == 2 else ""
-            
+            if event in ('info_log', 'error_log') and (id != self.default_id or self.mode != "home"):
+                # the view only follows the selected session, the log files get every session
+                self.write_session_log(id, event, loads(message)['data']['message'])
             if id != self.default_id:
                 return
             if self.mode != "home":
                 return
 
+            data = loads(message)
+
             if event == 'info_log':
                 self.handle_info_log(data['data']['message'])
             elif event == 'error_log':
@@ -395,87 +417,145 @@ class JesseLiveCLIApp(App):
                 self.handle_unexpected_termination(data['data'])      
             elif event == 'progressbar':
                 self.handle_progressbar(data)
-            elif event == 'general_info':
-                if not self.initialized:
-                    self.initialized = True
-                    self.start_time = data['data']['started_at']    
-                    
-                self.handle_general_info(data['data'])
-                if self.routes_info is None:
-                    self.routes_info = data['data']['routes']
-                self.handle_routes(data['data']['routes'])
-                
-            elif event == 'current_candles':
-                self.candles = data['data']                
-                self.handle_candles(data['data'])
-            elif event == 'positions':
-                self.positions = data['data']
-                self.handle_positions(data['data'])
-            elif event == 'watch_list':
-                self.handle_watch_list(data['data'])
-            elif event == 'orders':
-                self.handle_orders(data['data'])
+            elif event in SNAPSHOT_EVENTS:
+                self.apply_snapshot(event, data['data'])
             else:
                 self.handle_info_log(data)
                 
         except Exception as e:
             self.display_error(e)
+    def apply_snapshot(self, event: str, data):
+        """Take a general_info, current_candles, positions, watch_list or orders snapshot"""
+        if event == 'general_info':
+            if not self.initialized:
+                self.initialized = True
+                self.start_time = data['started_at']
+            if self.routes_info is None:
+                self.routes_info = data['routes']
+        elif event == 'current_candles':
+            self.candles = data
+        elif event == 'positions':
+            self.positions = data
+        self.schedule_render(event, data)
+
+    def restore_session(self):
+        """Repaint the selected session from the session store instead of waiting for its next frames"""
+        self.render_state = {}
+        self.dirty_panes = set()
+        # the routes are taken from the next general_info of this session
+        self.routes_info = None
+        for event, empty in (('general_info', None), ('current_candles', {}), ('positions', []), ('orders', []),
+                             ('watch_list', [])):
+            self.schedule_render(event, empty)
+        self.log_buffer = LogBuffer(self.log_buffer.lines.maxlen)
+        for message, key in self.session_store.frames(self.default_id):
+            event = key[1]
+            try:
+                data = loads(message)['data']
+                if event in SNAPSHOT_EVENTS:
+                    self.apply_snapshot(event, data)
+                else:
+                    self.log_buffer.append(self.log_line(event, data))
+            except Exception as e:
+                self.display_error(e)
+        self.schedule_render('log', f"Session {self.default_id}")
+        self.render_dirty()
+
+    def log_line(self, event: str, data):
+        """(level, text) of a stored log frame, as its handler shows it"""
+        if event == 'info_log':
+            return "info", str(data['message'])
+        if event == 'error_log':
+            return "error", str(data['message'])
+        if event == 'exception':
+            return "error", f"Exception: {data['message']}"
+        if event == 'termination':
+            return "error", f"Termination: {data}"
+        return "error", f"Unexpected Termination: {data}"
+
+    def schedule_render(self, pane: str, data=None):
+        """Keep the latest data of a pane and mark it for repaint on the next frame"""
+        self.render_state[pane] = data
+        self.dirty_panes.add(pane)
+
+    def render_dirty(self):
+        """Repaint the panes changed since the last frame, called at most max_fps times a second"""
+        if not self.dirty_panes or self.mode != "home":
+            return
+        dirty, self.dirty_panes = self.dirty_panes, set()
+        for pane, render in self.renderers.items():
+            if pane in dirty:
+                try:
+                    render(self.render_state[pane])
+                except Exception as e:
+                    self.display_error(e)
+
+    def render_general_info(self, infos):
+        if infos is None:
+            # a session without general_info yet: keep the row labels, clear the values and routes
+            table = self.query_one("#general-info", KeyedTable)
+            table.sync({row[0]: row[:1] + ("",) for row in GENERAL_INFO[1:]}, styled_cell)
+            self.handle_routes([])
+            return
+        self.handle_general_info(infos)
+        self.handle_routes(infos['routes'])
+
+    def render_log(self, message):
+        self.query_one("#error").update(message)
+        self.show_log()
+
     def handle_progressbar(self, data):
         _info = data['data']
         self.handle_info_log(f"Loading data: {_info['current']}% in {_info['estimated_remaining_seconds']:.2f}s")
 
     def handle_session_selected(self, session_id: str) -> None:
-        self.default_id = session_id
+        if session_id != self.default_id:
+            self.default_id = session_id
+            self.restore_session()
         self.display_error(f"Selected session: {session_id}")
         
     def handle_orders(self, orders: Dict[str, Dict]) -> None:
-        table = self.query_one("#order-info", DataTable)
-        table.clear()
-        for order in orders:
+        table = self.query_one("#order-info", KeyedTable)
+        rows = {}
+        created = get_timestamp_formatter().format_many([order['created_at'] for order in orders])
+        for i, order in enumerate(orders):
             color = "[green]" if order['side'] == 'buy' else "[red]"
-            values = [
+            rows[str(order.get('id', i))] = (
                 f"{color}{order['symbol']}",
                 f"{color}{order['type']}",
                 f"{color}{order['side']}",
                 f"{color}{order['qty']:.2f}",
                 f"{color}{order['price']:.2f}",
                 f"{color}{order['status']}",
-                f"{color}{timestamp_to_date(order['created_at'])}"                
-            ]
-            table.add_row(*values)
+                f"{color}{created[i]}"
+            )
+        table.sync(rows)
 
     def handle_candles(self, candles: Dict[str, Dict], round_digits: int = 3) -> None:
         """Show Route & Candles table"""
-        table = self.query_one("#candle-info", DataTable)
-        table.clear()
-        
-        
+        table = self.query_one("#candle-info", KeyedTable)
+        rows = {}
         for symbol, candle in candles.items():
             color = "[green]" if candle['open'] < candle['close'] else "[red]"
             if self.exchange_info is not None:
                 exchange_info = symbol[0:symbol.find("-")]
                 
+            key = symbol
             symbol = symbol[symbol.find("-") + 1:]
-            values = [
+            rows[key] = (
                 symbol,
                 f"{color}{candle['open']:.{round_digits}f}",
                 f"{color}{candle['close']:.{round_digits}f}",
                 f"{color}{candle['high']:.{round_digits}f}",
                 f"{color}{candle['low']:.{round_digits}f}",
                 f"{color}{candle['volume']:.{round_digits}f}"
-            ]
-            table.add_row(*values)
-        
-        
+            )
+        table.sync(rows)
+
     def handle_watch_list(self, watch_list: List[Dict]) -> None:
         try:
-            table = self.query_one("#watch-list",DataTable)
-            table.clear()
-            for key,value in watch_list:
-                values = []
-                values.append(key)       
-                values.append(value)  
-                table.add_row(*values)       
+            table = self.query_one("#watch-list", KeyedTable)
+            table.sync({str(key): (key, value) for key, value in watch_list})
         except Exception as e:
             self.display_error(e)
 
@@ -486,43 +566,29 @@ class JesseLiveCLIApp(App):
         self.query_one("#error").update(f"LOG INFO: {data}")
 
     def handle_info_log(self, data):
-                   
         if not self.initialized:
             return
 
-        
-        self.logger.info(data) 
-        self.query_one("#error").update(f"LOG INFO: {data}")
-            
-        # self.log_info.append(data)
-        self.log_info += f"\n{data}"
-        syntax = Syntax(str(self.log_info),
-                line_numbers=True,
-                word_wrap=True,
-                indent_guides=True,
-                theme="github-dark",
-                lexer="text")
-        try:   
-            self.query_one("#code").update(syntax)
-            self.query_one("#code").scroll_home(animate=False)
-        except Exception as e:
-            pass
-        
+        self.logger.info(data)
+        self.log_buffer.append(("info", str(data)))
+        self.schedule_render('log', f"LOG INFO: {data}")
+
+    def write_session_log(self, session_id: str, event: str, message):
+        level = logging.ERROR if event == 'error_log' else logging.INFO
+        self.logger.log(level, message, extra={'session': session_id or None})
+
     def handle_error_log(self, data):
         if self.initialized:
             self.logger.error(data)
-        # self.log_error.append(data)
-        self.log_error += f"\n{data}"
-        syntax = Syntax(self.log_error,
-                line_numbers=True,
-                word_wrap=True,
-                indent_guides=True,
-                theme="github-dark",
-                lexer="text")          
-        try:   
-            self.query_one("#code").update(syntax)
-            self.query_one("#code").scroll_home(animate=False)
-        except Exception as e:
+        self.log_buffer.append(("error", str(data)))
+        self.schedule_render('log', f"LOG ERROR: {data}")
+        self.render_dirty()  # errors and terminations don't wait for the next frame
+
+    def show_log(self):
+        """Append new buffered lines to the visible log pane"""
+        try:
+            self.query_one("#code", LogPane).sync()
+        except Exception:
             pass
 
     def handle_exception(self, data):
@@ -536,39 +602,36 @@ class JesseLiveCLIApp(App):
 
     def handle_positions(self, positions: List[Dict], round_digits: int = 3) -> None:
         try:
-            table = self.query_one("#position-info", DataTable)
-            table.clear()
+            table = self.query_one("#position-info", KeyedTable)
+            rows = {}
             for position in positions:
                 pnl = round(position['pnl'], round_digits) if position['type'] != 'close' else ""
                 pnl_perc = round(position['pnl_perc'], round_digits) if position['type'] != 'close' else ""
-                values = [
+                rows[position['symbol']] = (
                     position['symbol'],
                     position['qty'],
                     position['entry'],
                     position['current_price'],
                     pnl,
                     pnl_perc,
-                ]
-                table.add_row(*[Text(str(cell), style="bold #03AC13", justify="left") for cell in values])
+                )
+            table.sync(rows, styled_cell)
         except Exception as e:
             self.display_error(e)
 
     def handle_routes(self, routes: Dict) -> None:
         """Show Route"""
         try:         
-            table = self.query_one("#route-info",DataTable)
-            table.clear()            
+            table = self.query_one("#route-info", KeyedTable)
+            rows = {}
             for route in routes:
-                values = [
+                values = (
                     route['symbol'],
                     route['timeframe'],
                     route['strategy']
-                ]
-
-                styled_row = [
-                    Text(str(cell), style="bold #03AC13", justify="left") for cell in values
-                ]            
-                table.add_row(*styled_row)                
+                )
+                rows["-".join(str(value) for value in values)] = values
+            table.sync(rows, styled_cell)
         except Exception as e:
             # print(f"An error occurred: {e}")
             self.display_error(e)
@@ -589,14 +652,8 @@ class JesseLiveCLIApp(App):
                 f"{data.get('count_info_logs')} / {data.get('count_error_logs')}"
             ]
 
-            table = self.query_one("#general-info", DataTable)
-            table.clear()
-
-            for i, row in enumerate(GENERAL_INFO[1:]):
-                styled_row = [
-                    Text(str(cell), style="bold #03AC13", justify="left") for cell in row[:1] + (values[i],)
-                ]
-                table.add_row(*styled_row)
+            table = self.query_one("#general-info", KeyedTable)
+            table.sync({row[0]: row[:1] + (values[i],) for i, row in enumerate(GENERAL_INFO[1:])}, styled_cell)
 
         except Exception as e:
             self.display_error(e)
@@ -604,7 +661,10 @@ class JesseLiveCLIApp(App):
 
     def display_error(self, data):
         self.query_one("#error").update(f"Error: {str(data)}")
-        code_view = self.query_one("#code", Static).update(Traceback(theme="github-dark", width=None))
+        try:
+            self.query_one("#code", LogPane).write(Traceback(theme="github-dark", width=None))
+        except Exception:
+            pass
         if self.initialized:
             self.logger.error(f"Error: {str(data)}")
 
@@ -641,11 +701,55 @@ class JesseLiveCLIApp(App):
                 print(f"An unexpected error occurred: {e}. Reconnecting in 5 seconds...")
                 await asyncio.sleep(5)  # Wait before retrying
 
+    async def start_replay(self):
+        """Feed a recording into handle_message, at replay_speed x real time or as fast as possible when 0"""
+        from jesselivecli.recorder import read_recording
+
+        await asyncio.sleep(1)  # Wait for the screens to mount
+        loop = asyncio.get_running_loop()
+        count = 0
+        first_ts = None
+        started = loop.time()
+        last_report = started
+        for timestamp, message in read_recording(self.replay_source, self.replay_start):
+            if first_ts is None:
+                first_ts = timestamp
+            if self.replay_speed > 0:
+                delay = (timestamp - first_ts) / self.replay_speed - (loop.time() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif count % 100 == 0:
+                await asyncio.sleep(0)  # Let the UI render
+            await self.handle_message(message)
+            count += 1
+            now = loop.time()
+            if now - last_report >= 1:
+                last_report = now
+                self.sub_title = f"Replay: {count} messages, {count / (now - started):.0f} msg/s"
+
+        elapsed = max(loop.time() - started, 1e-9)
+        self.replay_summary = f"Replayed {count} messages in {elapsed:.2f}s, {count / elapsed:.0f} msg/s"
+        self.sub_title = self.replay_summary
+        self.logger.info(self.replay_summary)
+
     async def consumer_handler(self, websocket):
         async for message in websocket:
             await self.handle_message(message)
 
+    def update_subscription(self):
+        """Ask the proxy for the selected session only, plus general info of every session"""
+        if not self.subscribe_only or self.default_id == "":
+            return
+        self.command_queue.put_nowait({"command": "unsubscribe"})
+        self.command_queue.put_nowait({"command": "subscribe", "args": {"ids": ["*"], "events": ["general_info"]}})
+        self.command_queue.put_nowait({"command": "subscribe", "args": {"ids": [self.default_id], "events": ["*"]}})
+
     async def producer_handler(self, websocket, name):
+        # subscriptions first: a proxy starts sending on the first other command
+        self.update_subscription()
+        while not self.command_queue.empty():
+            await websocket.send(json.dumps(self.command_queue.get_nowait()))
+            self.command_queue.task_done()
         await websocket.send(json.dumps({"command": "join", "args": {"name": name}}))
         while True:
             command = await self.command_queue.get()
@@ -700,20 +804,27 @@ class JesseLiveCLIApp(App):
             # self.remove_class("started")
             self.info_log("Stopping session...")
             self.stop_route()
-            self.info_log("Session stopped!")
         elif event.button.id == "save":
             self.info_log("Saving session file")
             self.save_session_file()
 
 
-async def run_live_cli(server_config: str, routes_config: str, default_id: str = ""):
+async def run_live_cli(server_config: str, routes_config: str, default_id: str = "", subscribe_only: bool = False,
+                       replay_source: str = None, replay_speed: float = 1.0, replay_start: float = None):
     try:
         load_dotenv("./.env")
         default_config = get_default_config()
         app = JesseLiveCLIApp()
-        app.init_config(server_config, routes_config, default_id)    
+        app.init_config(server_config, routes_config, default_id, subscribe_only)
+        if replay_source:
+            app.init_replay(replay_source, replay_speed, replay_start)
 
         await app.run_async()
+        await app.close_clients()
+        if app.log_writer is not None:
+            app.log_writer.stop()
+        if app.replay_summary:
+            print(app.replay_summary)
     except Exception as e:
         print(f"An unexpected error occurred: {e}. Exiting...")
         exit()
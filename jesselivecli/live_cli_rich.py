@@ -20,7 +20,7 @@ import pathlib
 import yaml
 import arrow
 
-from jesselivecli.utils import get_config, get_config_json, generate_ws_url
+from jesselivecli.utils import get_config, get_config_json, generate_ws_url, loads, peek_envelope
 
 class JesseLiveCLI:
     def __init__(self, server_yaml, routes_yaml, server_json, routes_json, default_id: str = ""):
@@ -97,20 +97,20 @@ class JesseLiveCLI:
                 self.log.append("Websocket disconnected")
 
     async def process_response(self, response):
-        data = json.loads(response)
-        id = data['id']
+        id, event_name = peek_envelope(response)
         if self.default_id == "":
             self.default_id = id
         if id not in self.id_list:
             self.id_list.append(id)
 
-        event_info = data['event'].split(".")
-        event = event_info[1] if len(event_info) == 2 else ""
-        event_trading_mode = event_info[0] if len(event_info) == 2 else ""
-
         if id != self.default_id:
             return
 
+        event_info = event_name.split(".")
+        event = event_info[1] if len(event_info) == 2 else ""
+        event_trading_mode = event_info[0] if len(event_info) == 2 else ""
+        data = loads(response)
+
         # Process different events
         if event == 'info_log':
             self.handle_info_log(data)
@@ -0,0 +1,295 @@
+import gzip
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from jesselivecli.logwriter import JSON_LOG, TEXT_LOG
+
+INDEX_FILE = ".search.db"
+# Bumped when SCHEMA changes, an index of another version is rebuilt
+SCHEMA_VERSION = 1
+# "2024-05-01 12:30:00,123 INFO message" as written by the log writer's text files
+TEXT_LINE = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) ([A-Z]+) (.*)")
+# Start time in the name of the ./logs/<YYYYmmddHHMMSS>.txt files of older versions
+LEGACY_NAME = re.compile(r"(\d{14})\.txt$")
+# Words of a query string, double quotes keep spaces in a word: since:"2024-05-01 12:30"
+QUERY_WORD = re.compile(r'(?:"[^"]*"?|[^\s"]+)+')
+# key:value filters accepted in a query string
+QUERY_FILTER = re.compile(r"^(level|session|days|since|until):(.+)$")
+BATCH_LINES = 5000
+# Longest time range narrowed with day tokens, longer ranges only use the ts column
+MAX_RANGE_DAYS = 400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, inode INTEGER, size INTEGER, mtime REAL,
+    indexed INTEGER, lines INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY, file_id INTEGER, line INTEGER, offset INTEGER, ts REAL, level TEXT, session TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+CREATE INDEX IF NOT EXISTS entries_file ON entries (file_id);
+-- level, session and a "d<YYYYmmdd>" UTC day token are indexed with the text so
+-- filters narrow the full-text match itself instead of the rows it returns
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5(message, level, session, day);
+"""
+
+
+def is_searchable(name: str) -> bool:
+    """JSON-lines logs and their rotated .gz files, and the .txt logs of older versions.
+    The text twin of a JSON-lines log holds the same lines and is skipped."""
+    if name.endswith(".jsonl") or (name.startswith(JSON_LOG + ".") and name.endswith(".gz")):
+        return True
+    return name.endswith(".txt") and not name.startswith(TEXT_LOG)
+
+
+def parse_query(query: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split 'level:error days:7 since:"2024-05-01 12:30" ETH-USDT' into the text
+    to match and the filters.
+    """
+    terms, filters = [], {}
+    for word in QUERY_WORD.findall(query):
+        word = word.replace('"', '')
+        match = QUERY_FILTER.match(word)
+        if match:
+            filters[match.group(1)] = match.group(2)
+        else:
+            terms.append(word)
+    return " ".join(terms), filters
+
+
+def time_range(since: Optional[str] = None, until: Optional[str] = None,
+               days: Optional[float] = None) -> Tuple[Optional[float], Optional[float]]:
+    """Epoch bounds of `since` / `until` (epoch or local ISO date) narrowed to the last `days` days."""
+    from jesselivecli.utils import parse_timestamp
+
+    start = parse_timestamp(since) if since else None
+    if days:
+        start = max(start or 0, time.time() - float(days) * 86400)
+    return start, parse_timestamp(until) if until else None
+
+
+def fts_phrase(column: str, value: str) -> str:
+    """A quoted phrase, so "ETH-USDT" or "error:" are not read as FTS5 syntax."""
+    return column + ' : "' + value.replace('"', '""') + '"'
+
+
+def day_token(ts: float) -> str:
+    return time.strftime("d%Y%m%d", time.gmtime(ts))
+
+
+def day_tokens(since: float, until: float) -> List[str]:
+    return [day_token(day * 86400) for day in range(int(since // 86400), int(until // 86400) + 1)]
+
+
+class LogSearchIndex:
+    """
+    Full-text index of the log lines under a directory, in an SQLite FTS5
+    database inside it. Each line is stored with its file, line number, byte
+    offset, time, level and session. `update` only reads what was appended
+    since the last update; a file that was truncated or replaced (rotated) is
+    indexed again, lines of deleted files are dropped.
+    """
+
+    def __init__(self, directory: str = "./logs", db_path: Optional[str] = None):
+        self.directory = directory
+        self.db_path = db_path or os.path.join(directory, INDEX_FILE)
+        self.db = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self.db = sqlite3.connect(self.db_path)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.db.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS entries_text;")
+                self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.db.executescript(SCHEMA)
+        return self.db
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def log_files(self) -> List[str]:
+        paths = []
+        for root, _, names in os.walk(self.directory):
+            paths.extend(os.path.join(root, name) for name in sorted(names) if is_searchable(name))
+        return paths
+
+    def update(self) -> int:
+        """Index the new lines of every log file, return how many were added."""
+        db = self.connect()
+        known = {row[1]: row for row in db.execute("SELECT id, path, inode, size, mtime, indexed, lines FROM files")}
+        added = 0
+        paths = self.log_files()
+        # rotated files first, oldest first, so each takes over the lines indexed from the file it was rotated from
+        for path in sorted(paths, key=lambda path: (not path.endswith(".gz"), self.mtime(path))):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            row = known.get(path)
+            if row is None and path.endswith(".gz"):
+                row = self.rotated_from(path, known)
+            if row is not None:
+                file_id, _, inode, size, mtime, indexed, lines = row
+                if inode == stat.st_ino and size == stat.st_size and mtime == stat.st_mtime:
+                    continue
+                if row[1] != path:
+                    # lines up to `indexed` were read from the file before it was rotated into this .gz
+                    db.execute("UPDATE files SET path = ? WHERE id = ?", (path, file_id))
+                    known[path] = known.pop(row[1])
+                elif inode != stat.st_ino or stat.st_size < indexed or path.endswith(".gz"):
+                    self.forget(file_id)
+                    indexed, lines = 0, 0
+            else:
+                file_id = db.execute("INSERT INTO files (path, inode, size, mtime, indexed, lines) VALUES (?, ?, 0, 0, 0, 0)",
+                                     (path, stat.st_ino)).lastrowid
+                indexed, lines = 0, 0
+            added += self.index_file(file_id, path, stat, indexed, lines)
+        for path in set(known) - set(paths):
+            self.forget(known[path][0])
+            db.execute("DELETE FROM files WHERE id = ?", (known[path][0],))
+        db.commit()
+        return added
+
+    def mtime(self, path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+
+    def rotated_from(self, path: str, known: Dict):
+        """
+        Row of the log a new .gz was rotated from: the indexed file of that name
+        is gone, has another inode or is shorter than what was indexed (a new
+        file may get the inode of the one the rotation removed).
+        """
+        for candidate, row in known.items():
+            if candidate.endswith(".gz") or not path.startswith(candidate + "."):
+                continue
+            try:
+                stat = os.stat(candidate)
+                replaced = stat.st_ino != row[2] or stat.st_size < row[5]
+            except OSError:
+                replaced = True
+            if replaced:
+                return row
+        return None
+
+    def forget(self, file_id: int) -> None:
+        db = self.connect()
+        db.execute("DELETE FROM entries_text WHERE rowid IN (SELECT id FROM entries WHERE file_id = ?)", (file_id,))
+        db.execute("DELETE FROM entries WHERE file_id = ?", (file_id,))
+
+    def index_file(self, file_id: int, path: str, stat: os.stat_result, offset: int, line: int) -> int:
+        db = self.connect()
+        next_id = (db.execute("SELECT MAX(id) FROM entries").fetchone()[0] or 0) + 1
+        default_ts = self.file_time(path, stat)
+        session = self.file_session(path)
+        entries, texts, added = [], [], 0
+
+        def flush():
+            db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+            db.executemany("INSERT INTO entries_text (rowid, message, level, session, day) VALUES (?, ?, ?, ?, ?)", texts)
+            db.execute("UPDATE files SET inode = ?, size = ?, mtime = ?, indexed = ?, lines = ? WHERE id = ?",
+                       (stat.st_ino, stat.st_size, stat.st_mtime, offset, line, file_id))
+            db.commit()
+            entries.clear()
+            texts.clear()
+
+        for raw in self.read_lines(path, offset):
+            ts, level, line_session, message = self.parse_line(path, raw, default_ts)
+            if message:
+                entries.append((next_id, file_id, line, offset, ts, level, line_session or session))
+                texts.append((next_id, message, level or "", line_session or session or "", day_token(ts)))
+                next_id += 1
+                added += 1
+            offset += len(raw)
+            line += 1
+            default_ts = ts
+            if len(entries) >= BATCH_LINES:
+                flush()
+        flush()
+        return added
+
+    def read_lines(self, path: str, offset: int) -> Iterator[bytes]:
+        """Complete lines from `offset`, a line still being written is left for the next update."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as file:
+            file.seek(offset)
+            for raw in file:
+                if not raw.endswith(b"\n"):
+                    break
+                yield raw
+
+    def file_time(self, path: str, stat: os.stat_result) -> float:
+        """Time of lines without one: the start time in the name of old logs, else the file's mtime."""
+        match = LEGACY_NAME.search(path)
+        if match:
+            return datetime.strptime(match.group(1), "%Y%m%d%H%M%S").timestamp()
+        return stat.st_mtime
+
+    def file_session(self, path: str) -> Optional[str]:
+        parent = os.path.dirname(os.path.abspath(path))
+        return None if parent == os.path.abspath(self.directory) else os.path.basename(parent)
+
+    def parse_line(self, path: str, raw: bytes, default_ts: float) -> Tuple[float, Optional[str], Optional[str], str]:
+        text = raw.decode("utf-8", "replace").rstrip("\r\n")
+        if ".jsonl" in os.path.basename(path):
+            try:
+                record = json.loads(text)
+                return record["ts"], record.get("level"), record.get("session"), str(record.get("message", ""))
+            except (ValueError, KeyError, TypeError):
+                pass
+        match = TEXT_LINE.match(text)
+        if match:
+            ts = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp() + int(match.group(2)) / 1000
+            return ts, match.group(3).lower(), None, match.group(4)
+        return default_ts, None, None, text
+
+    def search(self, text: str = "", level: Optional[str] = None, session: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Newest lines containing every word of `text`, filtered by level, session and time range."""
+        conditions, params = [], []
+        match = [fts_phrase("message", word) for word in text.split()]
+        if level:
+            match.append(fts_phrase("level", level))
+        if session:
+            match.append(fts_phrase("session", session))
+        if since is not None:
+            days = day_tokens(since, until if until is not None else time.time())
+            if len(days) <= MAX_RANGE_DAYS:
+                match.append("(" + " OR ".join(fts_phrase("day", day) for day in days) + ")")
+        if match:
+            conditions.append("entries_text MATCH ?")
+            params.append(" AND ".join(match))
+        for condition, value in (("e.level = ?", level), ("e.session = ?", session),
+                                 ("e.ts >= ?", since), ("e.ts < ?", until)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        # without a full-text match, walk the ts index newest first instead of the whole text table
+        join = "JOIN" if match else "CROSS JOIN"
+        sql = ("SELECT e.ts, e.level, e.session, f.path, e.line, e.offset, entries_text.message "
+               f"FROM entries e {join} entries_text ON entries_text.rowid = e.id JOIN files f ON f.id = e.file_id")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY e.ts DESC, e.id DESC LIMIT ?"
+        params.append(limit)
+        columns = ("ts", "level", "session", "path", "line", "offset", "message")
+        return [dict(zip(columns, row)) for row in self.connect().execute(sql, params)]
+
+    def query(self, query: str, limit: int = 100) -> List[Dict]:
+        """search() with the filters written in the query: "level:error session:<id> days:7 ETH-USDT"."""
+        text, filters = parse_query(query)
+        since, until = time_range(filters.get("since"), filters.get("until"), filters.get("days"))
+        return self.search(text, filters.get("level"), filters.get("session"), since, until, limit)
@@ -0,0 +1,188 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import time
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+from typing import Callable, Optional
+
+TEXT_LOG = "log.txt"
+JSON_LOG = "log.jsonl"
+# Records logged without a session id
+APP_SESSION = "app"
+
+
+def gzip_namer(name: str) -> str:
+    """Rotated file name with a .gz suffix, numbered if that name is taken."""
+    candidate = name + ".gz"
+    count = 1
+    while os.path.exists(candidate):
+        candidate = f"{name}.{count}.gz"
+        count += 1
+    return candidate
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class SizedTimedRotatingFileHandler(BaseRotatingHandler):
+    """
+    Rotates when the file would grow past `max_bytes` or when a new period of
+    `interval` seconds starts (UTC days by default), keeping the newest
+    `backup_count` rotated files, gzipped.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 1024 * 1024, interval: int = 86400,
+                 backup_count: int = 30, encoding: str = "utf-8"):
+        super().__init__(filename, "a", encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.namer = gzip_namer
+        self.rotator = gzip_rotator
+        try:
+            last_write = os.path.getmtime(self.baseFilename)
+        except OSError:
+            last_write = time.time()
+        self.period = self.period_of(last_write)
+
+    def period_of(self, timestamp: float) -> int:
+        return int(timestamp // self.interval) if self.interval > 0 else 0
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.period_of(record.created) != self.period:
+            return os.path.exists(self.baseFilename)
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() + len(self.format(record)) + 1 > self.max_bytes
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.period = self.period_of(time.time())
+        if not os.path.exists(self.baseFilename) or os.path.getsize(self.baseFilename) == 0:
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.rotate(self.baseFilename, self.rotation_filename(f"{self.baseFilename}.{stamp}"))
+        if self.backup_count > 0:
+            rotated = sorted(glob.glob(glob.escape(self.baseFilename) + ".*.gz"), key=os.path.getmtime)
+            for path in rotated[:-self.backup_count]:
+                os.remove(path)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "session": getattr(record, "session", None),
+            "message": record.getMessage(),
+        })
+
+
+class SessionFileHandler(logging.Handler):
+    """
+    Routes each record to <directory>/<session>/log.txt and log.jsonl, by the
+    record's `session` attribute, each file rotating on its own.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, interval: int, backup_count: int):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.handlers = {}
+
+    def session_handlers(self, session: str):
+        if session not in self.handlers:
+            path = os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", session))
+            os.makedirs(path, exist_ok=True)
+            text = SizedTimedRotatingFileHandler(os.path.join(path, TEXT_LOG), self.max_bytes, self.interval, self.backup_count)
+            text.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            lines = SizedTimedRotatingFileHandler(os.path.join(path, JSON_LOG), self.max_bytes, self.interval, self.backup_count)
+            lines.setFormatter(JsonLinesFormatter())
+            self.handlers[session] = (text, lines)
+        return self.handlers[session]
+
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in self.session_handlers(getattr(record, "session", None) or APP_SESSION):
+            handler.handle(record)
+
+    def close(self) -> None:
+        for handlers in self.handlers.values():
+            for handler in handlers:
+                handler.close()
+        self.handlers = {}
+        super().close()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that counts records it drops when the queue is full instead of waiting."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogWriter:
+    """
+    Log writer that never does disk I/O on the caller's thread: records are
+    queued and a QueueListener thread formats, writes, rotates and compresses
+    the per-session text and JSON-lines files.
+    """
+
+    def __init__(self, directory: str = "./logs", max_bytes: int = 10 * 1024 * 1024, interval: int = 86400,
+                 backup_count: int = 30, max_pending: int = 100000):
+        self.directory = directory
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.queue_handler = NonBlockingQueueHandler(self.queue)
+        self.file_handler = SessionFileHandler(directory, max_bytes, interval, backup_count)
+        self.listener = QueueListener(self.queue, self.file_handler)
+        self.started = False
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.listener.start()
+        self.started = True
+
+    def stop(self):
+        """Write out the queued records and close the files."""
+        if self.started:
+            self.listener.stop()
+            self.file_handler.close()
+            self.started = False
+
+    def logger(self, name: str = "jesselivecli") -> logging.Logger:
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.handlers = [self.queue_handler]
+        return logger
+
+
+class SessionLogger(logging.LoggerAdapter):
+    """Tags each record with the session returned by `session()` when it is logged, unless one is given."""
+
+    def __init__(self, logger: logging.Logger, session: Callable[[], Optional[str]]):
+        super().__init__(logger, {})
+        self.session = session
+
+    def process(self, msg, kwargs):
+        extra = kwargs.setdefault("extra", {})
+        extra.setdefault("session", self.session() or None)
+        return msg, kwargs
@@ -0,0 +1,463 @@
+import asyncio
+import json
+import os
+import websockets
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Iterable, List, Optional, Tuple, Union
+
+from jesselivecli.utils import load_config, generate_ws_url, peek_envelope
+
+# Overflow policies applied when a client's outbound queue is full
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+CONFLATE = "conflate"
+OVERFLOW_POLICIES = (DROP_OLDEST, DISCONNECT, CONFLATE)
+
+# Seconds a silent new client waits before it is attached to the feed. Clients are
+# attached at once by their first subscribe or any other command, such as join.
+SUBSCRIBE_GRACE = 0.5
+
+# Full-state events: only the newest frame per (session id, event) matters
+SNAPSHOT_EVENTS = ('general_info', 'current_candles', 'positions', 'orders', 'watch_list')
+# Events that must be delivered in order and never conflated
+LOG_EVENTS = ('info_log', 'error_log', 'exception', 'termination', 'unexpectedTermination')
+
+# Start of the frames tagged by tag_origin
+SERVER_FIELD = '{"server": '
+
+
+def frame_key(message: str) -> Optional[Tuple[str, ...]]:
+    """
+    Return the (session id, event name) pair of a Jesse frame, followed by the
+    server name for frames tagged by tag_origin, None if it can't be decoded.
+    """
+    try:
+        session_id, event = peek_envelope(message)
+        key = (session_id, event[event.find(".") + 1:])
+        if message.startswith(SERVER_FIELD):
+            key += (json.JSONDecoder().raw_decode(message, len(SERVER_FIELD))[0],)
+        return key
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def matches(subscriptions: List[Tuple[List[str], List[str]]], key: Optional[Tuple[str, str]]) -> bool:
+    """True if the frame key matches any (session id patterns, event patterns) subscription."""
+    if not subscriptions or key is None:
+        return True
+    session_id, event = key[0], key[1]
+    for ids, events in subscriptions:
+        if any(fnmatchcase(session_id, p) for p in ids) and any(fnmatchcase(event, p) for p in events):
+            return True
+    return False
+
+
+def tag_origin(message: str, server: str) -> str:
+    """Add a "server" field to a JSON object frame without re-encoding it."""
+    if not message.startswith('{'):
+        return message
+    return SERVER_FIELD + json.dumps(server) + ', ' + message[1:]
+
+
+def upstream_name(data: dict) -> str:
+    return str(data.get('name') or f"{data['host']}:{data['port']}")
+
+
+def load_upstreams(server_configs: List[str]) -> List[Tuple[str, str]]:
+    """
+    Return the (name, websocket url) of each server config, skipping unreadable
+    and repeated config files. The names tag the frames of several upstreams,
+    so a name already taken by another config gets a numbered suffix.
+    """
+    upstreams = []
+    paths = set()
+    names = set()
+    for config_file in server_configs:
+        path = os.path.realpath(config_file)
+        if path in paths:
+            print(f"Skipping upstream {config_file}, already loaded")
+            continue
+        cfg = load_config(config_file)
+        if cfg is None:
+            print(f"Skipping upstream {config_file}")
+            continue
+        paths.add(path)
+        data = cfg["server"]
+        name = base = upstream_name(data)
+        count = 2
+        while name in names:
+            name = f"{base}-{count}"
+            count += 1
+        if name != base:
+            print(f"Upstream name {base} of {config_file} is already used, its frames are tagged {name}")
+        names.add(name)
+        upstreams.append((name, generate_ws_url(data['host'], data['port'], data['password'])))
+    return upstreams
+
+
+def session_of(key: Tuple[str, ...]) -> Tuple[str, ...]:
+    """The session id of a frame key, with its server when the frame is tagged."""
+    return key[:1] + key[2:]
+
+
+class SessionCache:
+    """
+    Last frame of each snapshot event plus a bounded tail of log events per
+    session, replayed to clients as soon as they connect. With `max_bytes`
+    the oldest log lines of a session are dropped to keep it under that size,
+    and a snapshot that can't fit next to the session's other snapshots is not
+    cached: it replaces the previous one only for live delivery.
+    Sessions of tagged frames are kept per server, so the same session id on
+    two upstreams is cached twice.
+    """
+
+    def __init__(self, log_tail: int = 100, max_bytes: int = 0):
+        self.log_tail = log_tail
+        self.max_bytes = max_bytes
+        self.snapshots = {}
+        self.logs = {}
+        self.sizes = {}
+
+    def update(self, message: str, key: Optional[Tuple[str, ...]]) -> None:
+        if key is None:
+            return
+        session_id, event = session_of(key), key[1]
+        if event in ('termination', 'unexpectedTermination'):
+            self.snapshots.pop(session_id, None)
+            self.logs.pop(session_id, None)
+            self.sizes.pop(session_id, None)
+        elif event in SNAPSHOT_EVENTS:
+            snapshots = self.snapshots.setdefault(session_id, {})
+            previous = snapshots.pop(event, '')
+            if self.max_bytes and sum(map(len, snapshots.values())) + len(message) > self.max_bytes:
+                # oversized: the stale snapshot it replaces goes too, rather than be replayed
+                self.resize(session_id, -len(previous))
+                return
+            self.resize(session_id, len(message) - len(previous))
+            snapshots[event] = message
+        elif event in LOG_EVENTS and self.log_tail > 0:
+            if session_id not in self.logs:
+                self.logs[session_id] = deque(maxlen=self.log_tail)
+            logs = self.logs[session_id]
+            dropped = logs.popleft() if len(logs) == self.log_tail else ''
+            logs.append(message)
+            self.resize(session_id, len(message) - len(dropped))
+
+    def resize(self, session_id: Tuple[str, ...], delta: int) -> None:
+        size = self.sizes.get(session_id, 0) + delta
+        logs = self.logs.get(session_id)
+        while self.max_bytes and size > self.max_bytes and logs:
+            size -= len(logs.popleft())
+        self.sizes[session_id] = size
+
+    def frames(self, session_id: Optional[str] = None):
+        """
+        Yield (message, key) pairs, snapshots first in SNAPSHOT_EVENTS order,
+        then the log tails, of every session or only `session_id` (on any server).
+        """
+        for sid, snapshots in self.snapshots.items():
+            if session_id is None or sid[0] == session_id:
+                for event in SNAPSHOT_EVENTS:
+                    if event in snapshots:
+                        yield snapshots[event], (sid[0], event) + sid[1:]
+        for sid, logs in self.logs.items():
+            if session_id is None or sid[0] == session_id:
+                for message in logs:
+                    yield message, frame_key(message)
+
+
+class ProxyClient:
+    """
+    A downstream websocket with its own bounded outbound queue and writer task,
+    so a slow consumer never holds up delivery to the other clients.
+
+    With the conflate policy, snapshot events are kept latest-value per
+    (session id, event): while a client is behind, a newer snapshot replaces
+    the pending one in place. These slots are bounded by the number of keys,
+    so they don't count against `max_queue` and are never evicted; only log
+    events do, keeping their order. A client more than `max_queue` log
+    frames behind is disconnected rather than skip any of them.
+
+    A client only receives frames matching its subscriptions, or every frame
+    when it has none.
+    """
+
+    def __init__(self, websocket, max_queue: int = 1000, policy: str = DROP_OLDEST):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        # (key, message) entries; conflated snapshots keep message=None and live in self.latest
+        self.pending = deque()
+        self.latest = {}
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.writer_task = None
+        self.subscriptions = []
+        self.routes = {}
+
+        # lag counters
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_lag = 0
+
+    @property
+    def lag(self) -> int:
+        return len(self.pending)
+
+    @property
+    def backlog(self) -> int:
+        """Pending frames counted against max_queue: all but the conflated snapshot slots."""
+        return len(self.pending) - len(self.latest)
+
+    @property
+    def name(self) -> str:
+        try:
+            host, port = self.websocket.remote_address[:2]
+            return f"{host}:{port}"
+        except Exception:
+            return str(id(self.websocket))
+
+    def start(self):
+        self.writer_task = asyncio.create_task(self.writer())
+
+    def wants(self, key: Optional[Tuple[str, str]]) -> bool:
+        if key not in self.routes:
+            self.routes[key] = matches(self.subscriptions, key)
+        return self.routes[key]
+
+    def subscribe(self, ids: List[str], events: List[str]) -> None:
+        self.subscriptions.append((ids, events))
+        self.routes = {}
+        self.drop_unwanted()
+
+    def unsubscribe(self) -> None:
+        self.subscriptions = []
+        self.routes = {}
+
+    def drop_unwanted(self) -> None:
+        """Remove pending frames that no longer match the subscriptions."""
+        pending = deque()
+        for key, message in self.pending:
+            if message is None:
+                if self.wants(key):
+                    pending.append((key, None))
+                else:
+                    del self.latest[key]
+            elif self.wants(frame_key(message)):
+                pending.append((key, message))
+        self.pending = pending
+
+    def enqueue(self, message: str, key: Optional[Tuple[str, str]] = None) -> None:
+        """Queue a frame without blocking; apply the overflow policy when the queue is full."""
+        if self.closed or not self.wants(key):
+            return
+        self.received += 1
+        conflatable = self.policy == CONFLATE and key is not None and key[1] in SNAPSHOT_EVENTS
+        if conflatable and key in self.latest:
+            self.latest[key] = message
+            self.conflated += 1
+            return
+        if not conflatable and self.backlog >= self.max_queue and not self.make_room():
+            return
+        self.push(message, key, conflatable)
+
+    def replay(self, frames: Iterable[Tuple[str, Optional[Tuple[str, str]]]]) -> None:
+        """
+        Queue cached (message, key) frames ahead of live delivery. The replay
+        is exempt from the overflow policy so it never evicts a snapshot: every
+        wanted snapshot is queued, followed by the newest log frames that fit
+        in half of the room left, the other half is kept for live frames.
+        Conflated snapshots take no room.
+        """
+        snapshots, logs = [], []
+        for message, key in frames:
+            if self.wants(key):
+                if key is not None and key[1] in SNAPSHOT_EVENTS:
+                    snapshots.append((message, key))
+                else:
+                    logs.append((message, key))
+        taken = self.backlog + (0 if self.policy == CONFLATE else len(snapshots))
+        room = max(self.max_queue - taken, 0) // 2
+        for message, key in snapshots + (logs[-room:] if room else []):
+            if self.closed:
+                return
+            self.received += 1
+            conflatable = self.policy == CONFLATE and key is not None and key[1] in SNAPSHOT_EVENTS
+            if conflatable and key in self.latest:
+                self.latest[key] = message
+                self.conflated += 1
+            else:
+                self.push(message, key, conflatable)
+
+    def push(self, message: str, key: Optional[Tuple[str, str]], conflatable: bool) -> None:
+        if conflatable:
+            self.latest[key] = message
+            self.pending.append((key, None))
+        else:
+            self.pending.append((None, message))
+        if len(self.pending) > self.max_lag:
+            self.max_lag = len(self.pending)
+        self.ready.set()
+
+    def make_room(self) -> bool:
+        """Free one queue slot according to the policy, return False if the client was disconnected."""
+        if self.policy == DROP_OLDEST:
+            self.pending.popleft()
+            self.dropped += 1
+            return True
+        self.dropped += len(self.pending) + 1
+        self.pending.clear()
+        self.latest.clear()
+        self.close()
+        return False
+
+    async def writer(self):
+        try:
+            while not self.closed:
+                if not self.pending:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+                key, message = self.pending.popleft()
+                if message is None:
+                    message = self.latest.pop(key)
+                await self.websocket.send(message)
+                self.sent += 1
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.closed = True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.ready.set()
+        print(f"Client {self.name} is too slow ({self.dropped} dropped), disconnecting")
+        asyncio.create_task(self.websocket.close(code=1008, reason="slow consumer"))
+
+    def stats(self) -> str:
+        return (f"{self.name}: lag {self.lag}/{self.max_queue} max {self.max_lag} "
+                f"received {self.received} sent {self.sent} dropped {self.dropped} conflated {self.conflated}")
+
+
+async def start_proxy(server_config: Union[str, List[str]], listen_port: int, max_queue: int = 1000,
+                      policy: str = DROP_OLDEST, stats_interval: int = 0, cache: bool = True,
+                      log_tail: int = 100, recorder=None):
+    """
+    Forward the streams of one or more Jesse servers to every connected client.
+    With several upstreams each frame is tagged with the "server" it came from.
+    Frames are also written to `recorder` (a FrameRecorder) when given.
+    """
+    server_configs = [server_config] if isinstance(server_config, str) else list(server_config)
+    upstreams = load_upstreams(server_configs)
+    tag = len(upstreams) > 1
+
+    connected_clients = set()
+    session_cache = SessionCache(log_tail) if cache else None
+
+    async def forward_messages(name: str, source_url: str):
+        while True:
+            try:
+                print(f"[{name}] Connecting ...")
+                async with websockets.connect(source_url) as source:
+                    print(f"[{name}] Connected to server, Forwarding messages....")
+                    async for message in source:
+                        if tag:
+                            message = tag_origin(message, name)
+                        key = frame_key(message)
+                        if session_cache:
+                            session_cache.update(message, key)
+                        if recorder:
+                            recorder.record(message, key[0] if key else None)
+                        for client in connected_clients:
+                            client.enqueue(message, key)
+            except websockets.ConnectionClosed as e:
+                print(f"[{name}] Connection closed: {e}. Attempting to reconnect in 5s...")
+                await asyncio.sleep(5)  # Wait for 5 seconds before retrying
+            except websockets.InvalidURI as e:
+                print(f"[{name}] Invalid URI: {e}. Check the WebSocket URL.")
+                break  # Exit the loop if the URI is invalid
+            except websockets.InvalidHandshake as e:
+                print(f"[{name}] Invalid handshake: {e}. Check the server configuration.")
+                break  # Exit the loop if the handshake fails
+            except Exception as e:
+                print(f"[{name}] An unexpected error occurred: {e}. Retrying in 5s...")
+                await asyncio.sleep(5)  # Wait for 5 seconds before retrying
+
+    async def report_stats():
+        while True:
+            await asyncio.sleep(stats_interval)
+            for client in list(connected_clients):
+                print(client.stats())
+
+    def attach(client: ProxyClient) -> None:
+        """Start live delivery to a client, preceded by the cached session state."""
+        if client in connected_clients or client.closed:
+            return
+        if session_cache:
+            client.replay(session_cache.frames())
+        connected_clients.add(client)
+
+    def handle_command(client: ProxyClient, raw: str) -> None:
+        try:
+            command = json.loads(raw)
+            name = command.get('command')
+            args = command.get('args') or {}
+        except (ValueError, AttributeError):
+            name, args = None, {}
+        if name not in ('subscribe', 'unsubscribe'):
+            # e.g. {"command": "join"}: the client is not going to subscribe first
+            attach(client)
+        elif name == 'subscribe':
+            previous = list(client.subscriptions)
+            ids = args.get('ids') or ['*']
+            events = args.get('events') or ['*']
+            client.subscribe(ids, events)
+            print(f"Client {client.name} subscribed to ids {ids} events {events}")
+            if client not in connected_clients:
+                attach(client)
+            elif session_cache and previous:
+                # catch up on cached state the client was not receiving so far
+                client.replay((message, key) for message, key in session_cache.frames()
+                              if not matches(previous, key) and matches([(ids, events)], key))
+        elif name == 'unsubscribe':
+            client.unsubscribe()
+            print(f"Client {client.name} unsubscribed")
+
+    async def handle_client(websocket, path):
+        print("New client connected!")
+        client = ProxyClient(websocket, max_queue, policy)
+        client.start()
+        # a client that sends nothing is attached after a moment, see handle_command
+        grace = asyncio.get_running_loop().call_later(SUBSCRIBE_GRACE, attach, client)
+        try:
+            async for raw in websocket:
+                handle_command(client, raw)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            grace.cancel()
+            connected_clients.discard(client)
+            client.closed = True
+            client.ready.set()
+            print(f"Client disconnected! {client.stats()}")
+
+    if recorder:
+        recorder.start()
+    server = await websockets.serve(handle_client, "localhost", listen_port)
+    tasks = [asyncio.create_task(forward_messages(name, url)) for name, url in upstreams]
+    if stats_interval > 0:
+        tasks.append(asyncio.create_task(report_stats()))
+
+    print(f"Proxy server started on port {listen_port}")
+    try:
+        await server.wait_closed()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if recorder:
+            recorder.stop()
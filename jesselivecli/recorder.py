@@ -0,0 +1,272 @@
+import asyncio
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import websockets
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple, Union
+
+from jesselivecli.proxy import frame_key, load_upstreams, tag_origin
+
+SEGMENT_SUFFIX = ".frames.gz"
+INDEX_SUFFIX = ".idx"
+
+
+class FrameRecorder:
+    """
+    Append raw frames to rotating segment files on a background thread.
+
+    A segment is a sequence of gzip members, one per block of `block_seconds`,
+    so it is still a valid .gz file but any block can be decompressed on its
+    own. The sidecar index has one JSON line per block with its time range,
+    session ids and byte offset. Each recorded line is "<timestamp>\\t<frame>".
+    """
+
+    def __init__(self, directory: str, segment_seconds: int = 3600, block_seconds: int = 60,
+                 max_pending: int = 100000, compresslevel: int = 6):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.block_seconds = block_seconds
+        self.compresslevel = compresslevel
+        self.frames = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self.dropped = 0
+
+        self.segment = None
+        self.index = None
+        self.segment_start = 0
+        self.block = []
+        self.block_start = 0
+        self.block_end = 0
+        self.block_ids = set()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name="frame-recorder")
+        self.thread.start()
+        print(f"Recording frames to {self.directory}")
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.frames.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def record(self, message: str, session_id: Optional[str] = None) -> None:
+        """Queue a frame for writing, never blocks the event loop."""
+        try:
+            self.frames.put_nowait((time.time(), message, session_id))
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    item = self.frames.get(timeout=1)
+                except queue.Empty:
+                    item = False
+                if item is None:
+                    break
+                now = time.time()
+                if self.block and now - self.block_start >= self.block_seconds:
+                    self.flush_block()
+                if item:
+                    self.add(*item)
+        finally:
+            self.flush_block()
+            self.close_segment()
+
+    def add(self, timestamp: float, message: str, session_id: Optional[str]) -> None:
+        if not self.block:
+            self.block_start = timestamp
+        self.block_end = timestamp
+        self.block.append(f"{timestamp:.3f}\t{message}\n")
+        if session_id:
+            self.block_ids.add(session_id)
+
+    def flush_block(self) -> None:
+        if not self.block:
+            return
+        if self.segment is None or self.block_start - self.segment_start >= self.segment_seconds:
+            self.open_segment(self.block_start)
+        data = gzip.compress("".join(self.block).encode("utf-8"), compresslevel=self.compresslevel)
+        offset = self.segment.tell()
+        self.segment.write(data)
+        self.segment.flush()
+        self.index.write(json.dumps({
+            "start": round(self.block_start, 3),
+            "end": round(self.block_end, 3),
+            "offset": offset,
+            "length": len(data),
+            "frames": len(self.block),
+            "ids": sorted(self.block_ids),
+        }) + "\n")
+        self.index.flush()
+        self.block = []
+        self.block_ids = set()
+
+    def open_segment(self, timestamp: float) -> None:
+        self.close_segment()
+        name = datetime.fromtimestamp(timestamp).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, name)
+        self.segment = open(path + SEGMENT_SUFFIX, "ab")
+        self.index = open(path + SEGMENT_SUFFIX + INDEX_SUFFIX, "a")
+        self.segment_start = timestamp
+
+    def close_segment(self) -> None:
+        if self.segment is not None:
+            self.segment.close()
+            self.index.close()
+            self.segment = None
+            self.index = None
+
+
+class JsonLinesRecorder(FrameRecorder):
+    """
+    Write frames to one plain capture file instead of segments, one
+    {"ts": ..., "id": ..., "frame": ...} JSON object per line.
+    """
+
+    def __init__(self, path: str, max_pending: int = 100000):
+        super().__init__(os.path.dirname(path) or ".", max_pending=max_pending)
+        self.path = path
+
+    def add(self, timestamp: float, message: str, session_id: Optional[str]) -> None:
+        if self.segment is None:
+            self.segment = open(self.path, "a")
+        self.segment.write(json.dumps({"ts": round(timestamp, 3), "id": session_id, "frame": message}) + "\n")
+        if self.frames.empty():
+            self.segment.flush()
+
+    def flush_block(self) -> None:
+        pass
+
+    def close_segment(self) -> None:
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+
+def list_segments(directory: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def read_index(segment_path: str) -> List[dict]:
+    blocks = []
+    try:
+        with open(segment_path + INDEX_SUFFIX) as file:
+            for line in file:
+                try:
+                    blocks.append(json.loads(line))
+                except ValueError:
+                    break  # partially written last line
+    except FileNotFoundError:
+        pass
+    return blocks
+
+
+def read_frames(directory: str, start: Optional[float] = None, end: Optional[float] = None,
+                session_id: Optional[str] = None) -> Iterator[Tuple[float, str]]:
+    """
+    Yield (timestamp, frame) pairs recorded between `start` and `end`, for
+    one session if `session_id` is given, only decompressing the blocks the
+    index says overlap that range.
+    """
+    for segment_path in list_segments(directory):
+        blocks = read_index(segment_path)
+        if not blocks:
+            continue
+        if end is not None and blocks[0]["start"] > end:
+            break
+        if start is not None and blocks[-1]["end"] < start:
+            continue
+        with open(segment_path, "rb") as segment:
+            for block in blocks:
+                if start is not None and block["end"] < start:
+                    continue
+                if end is not None and block["start"] > end:
+                    return
+                if session_id is not None and session_id not in block["ids"]:
+                    continue
+                segment.seek(block["offset"])
+                data = gzip.decompress(segment.read(block["length"])).decode("utf-8")
+                for line in data.splitlines():
+                    timestamp, _, message = line.partition("\t")
+                    timestamp = float(timestamp)
+                    if start is not None and timestamp < start:
+                        continue
+                    if end is not None and timestamp > end:
+                        return
+                    if session_id is not None:
+                        key = frame_key(message)
+                        if key is not None and key[0] != session_id:
+                            continue
+                    yield timestamp, message
+
+
+def read_capture(path: str, start: Optional[float] = None, end: Optional[float] = None,
+                 session_id: Optional[str] = None) -> Iterator[Tuple[float, str]]:
+    """Yield (timestamp, frame) pairs from a JSON-lines capture file."""
+    with open(path) as file:
+        for line in file:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            timestamp = item["ts"]
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp > end:
+                return
+            if session_id is not None and item.get("id") not in (None, session_id):
+                continue
+            yield timestamp, item["frame"]
+
+
+def read_recording(source: str, start: Optional[float] = None, end: Optional[float] = None,
+                   session_id: Optional[str] = None) -> Iterator[Tuple[float, str]]:
+    """Read either a segment directory written by FrameRecorder or a JSON-lines capture file."""
+    if os.path.isdir(source):
+        return read_frames(source, start, end, session_id)
+    return read_capture(source, start, end, session_id)
+
+
+async def record_stream(server_config: Union[str, List[str]], recorder: FrameRecorder):
+    """Record the streams of one or more Jesse servers until cancelled."""
+    server_configs = [server_config] if isinstance(server_config, str) else list(server_config)
+    upstreams = load_upstreams(server_configs)
+    tag = len(upstreams) > 1
+
+    async def record_messages(name: str, source_url: str):
+        while True:
+            try:
+                print(f"[{name}] Connecting ...")
+                async with websockets.connect(source_url) as source:
+                    print(f"[{name}] Connected to server, Recording messages....")
+                    async for message in source:
+                        if tag:
+                            message = tag_origin(message, name)
+                        key = frame_key(message)
+                        recorder.record(message, key[0] if key else None)
+            except websockets.ConnectionClosed as e:
+                print(f"[{name}] Connection closed: {e}. Attempting to reconnect in 5s...")
+                await asyncio.sleep(5)
+            except (websockets.InvalidURI, websockets.InvalidHandshake) as e:
+                print(f"[{name}] Can't connect: {e}. Check the server configuration.")
+                break
+            except Exception as e:
+                print(f"[{name}] An unexpected error occurred: {e}. Retrying in 5s...")
+                await asyncio.sleep(5)
+
+    recorder.start()
+    try:
+        await asyncio.gather(*(record_messages(name, url) for name, url in upstreams))
+    finally:
+        recorder.stop()
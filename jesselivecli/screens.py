@@ -1,14 +1,23 @@
 from textual.app import ComposeResult
 from textual.screen import Screen
-from textual.widgets import DirectoryTree, Footer, Label, Button, Static, DataTable, Input
+from textual.widgets import DirectoryTree, Footer, Label, Button, Static, DataTable, Input, RichLog
 from textual.containers import Container, Horizontal, VerticalScroll, Vertical
 from textual.reactive import var
 from textual.message import Message
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.geometry import Size
+from textual.worker import get_current_worker
+from textual import work
 from rich.syntax import Syntax
 from rich.traceback import Traceback
 from rich.text import Text
-from typing import Iterable
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import time
 from pathlib import Path
+from jesselivecli.config import get_default_config
+from jesselivecli.utils import LineIndex
 
 
 SESSION_INFO = [
@@ -65,15 +74,201 @@ class SessionSelectMessage(Message):
         super().__init__()
         self.session_id = session_id
 
+class LogPane(RichLog):
+    """Log view that appends only the new lines of the app's LogBuffer, so each line costs the same."""
+
+    shown = 0
+    buffer = None
+
+    def on_mount(self) -> None:
+        self.sync()
+
+    def sync(self) -> None:
+        buffer = getattr(self.app, "log_buffer", None)
+        if buffer is None:
+            return
+        if buffer is not self.buffer:
+            # the app switched to another session's buffer
+            self.clear()
+            self.shown = 0
+            self.buffer = buffer
+        for level, message in buffer.since(self.shown):
+            self.write(Text(message, style="red" if level == "error" else ""))
+        self.shown = buffer.count
+
+class LogFileView(ScrollView, can_focus=True):
+    """
+    Pager for log files of any size: lines are read through a LineIndex memory
+    map and only the visible ones are rendered. The index is built in a worker
+    thread; until it reaches the end of the file, the view shows the last
+    TAIL_LINES lines (Home leaves that tail). Scrolled to the bottom, the view
+    follows the file as it grows.
+    """
+
+    BINDINGS = [
+        ("home", "first_line", "Top"),
+        ("end", "last_line", "Bottom"),
+    ]
+    TAIL_LINES = 1000
+
+    index = None
+    indexing = False
+    follow = True
+    tail_lines = []
+    gutter = 1
+    widest = 0
+    target_line = None
+    marked_line = None
+
+    def on_mount(self) -> None:
+        self.set_interval(1, self.poll)
+
+    def open(self, path, line: Optional[int] = None) -> None:
+        """Open a file at its end, or at `line` (0-based) once the index reaches it."""
+        index = LineIndex(path)
+        if self.index is not None:
+            self.index.close()
+        self.index = index
+        self.follow = line is None
+        self.target_line = self.marked_line = line
+        self.widest = 0
+        self.update_lines()
+        self.start_indexing()
+
+    @property
+    def tailing(self) -> bool:
+        return self.follow and self.index is not None and not self.index.complete
+
+    def start_indexing(self) -> None:
+        self.indexing = True
+        self.build_index(self.index)
+
+    @work(thread=True, exclusive=True, group="log-index", exit_on_error=False)
+    def build_index(self, index: LineIndex) -> None:
+        worker = get_current_worker()
+        while not worker.is_cancelled and index.index_chunk():
+            self.app.call_from_thread(self.update_lines)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.index_done, index)
+
+    def index_done(self, index: LineIndex) -> None:
+        if index is self.index:
+            self.indexing = False
+            self.update_lines()
+
+    def poll(self) -> None:
+        """Pick up what was appended to the file since the last poll."""
+        if self.index is None or self.indexing:
+            return
+        if not self.tailing:
+            self.follow = self.scroll_y >= self.max_scroll_y
+        if self.index.refresh():
+            self.start_indexing()
+
+    def update_lines(self) -> None:
+        index = self.index
+        if self.tailing:
+            self.tail_lines = index.tail(self.TAIL_LINES)
+            height = len(self.tail_lines)
+        else:
+            self.tail_lines = []
+            height = index.line_count
+        self.gutter = len(str(index.line_count)) + 1
+        self.virtual_size = Size(self.gutter + self.widest, height)
+        if self.target_line is not None and self.target_line < index.line_count:
+            self.scroll_to(y=max(self.target_line - self.size.height // 2, 0), animate=False)
+            self.target_line = None
+        elif self.follow:
+            self.scroll_end(animate=False)
+        self.refresh()
+        status = f"{index.path} - {index.line_count:,} lines"
+        if not index.complete:
+            status += f", indexing {index.progress:.0%}"
+        self.screen.sub_title = status
+
+    def action_first_line(self) -> None:
+        self.follow = False
+        if self.index is not None:
+            self.update_lines()
+        self.scroll_home(animate=False)
+
+    def action_last_line(self) -> None:
+        self.follow = True
+        if self.index is not None:
+            self.update_lines()
+        self.scroll_end(animate=False)
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        number = scroll_y + y
+        width = self.size.width
+        if self.index is None:
+            return Strip.blank(width, self.rich_style)
+        if self.tailing:
+            if number >= len(self.tail_lines):
+                return Strip.blank(width, self.rich_style)
+            line, label = self.tail_lines[number], ""
+        else:
+            if number >= self.index.line_count:
+                return Strip.blank(width, self.rich_style)
+            line, label = self.index.line(number), str(number + 1)
+        if len(line) > self.widest:
+            self.widest = len(line)
+        # only the visible part of long lines is styled
+        line = line[:scroll_x + width].expandtabs()
+        style = "red" if " ERROR " in line or '"level": "error"' in line else ""
+        if number == self.marked_line and not self.tailing:
+            style += " reverse"
+        text = Text.assemble((label.rjust(self.gutter - 1) + " ", "dim"), (line, style), no_wrap=True, end="")
+        strip = Strip(text.render(self.app.console), text.cell_len)
+        return strip.crop_extend(scroll_x, scroll_x + width, self.rich_style)
+
+class KeyedTable(DataTable):
+    """
+    DataTable updated in place by row key: only cells whose value changed are
+    redrawn and rows are added or removed only when the set of keys changes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.row_values = {}
+
+    def clear(self, columns: bool = False):
+        self.row_values = {}
+        return super().clear(columns)
+
+    def sync(self, rows: Dict[str, Tuple], style: Optional[Callable] = None) -> None:
+        """Make the table show `rows` (row key -> cell values), `style` turns a value into a cell."""
+        previous = self.row_values
+        for key in [key for key in previous if key not in rows]:
+            self.remove_row(key)
+            del previous[key]
+
+        column_keys = list(self.columns)
+        for key, values in rows.items():
+            old = previous.get(key)
+            if old is None:
+                self.add_row(*(style(value) for value in values) if style else values, key=key)
+            elif old != values:
+                for column_key, value, old_value in zip(column_keys, values, old):
+                    if value != old_value:
+                        self.update_cell(key, column_key, style(value) if style else value)
+            previous[key] = values
+
 class FilteredDirectoryTree(DirectoryTree):
     def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
-        return [path for path in paths if path.suffix in [".json", ".yml", ".txt","."]]
+        # directories are kept for the per-session folders of ./logs
+        return [path for path in paths if path.is_dir() or path.suffix in [".json", ".yml", ".txt", ".jsonl", "."]]
 
 class RoutesScreen(Screen):
     BINDINGS = [
         ("f", "toggle_files", "Toggle Files"),
     ]
     show_tree = var(True)
+
+    def on_screen_resume(self) -> None:
+        for pane in self.query(LogPane):
+            pane.sync()
     
     def watch_show_tree(self, show_tree: bool) -> None:
         self.set_class(show_tree, "-show-tree")
@@ -99,7 +294,7 @@ class RoutesScreen(Screen):
                     yield Label("LOG", id="error")
                     yield Static(id="route-code", expand=True)
                     with VerticalScroll(id="code-view"):
-                        yield Static(id="code", expand=True)                    
+                        yield LogPane(id="code", max_lines=get_default_config()['DEFAULT_LOG_LINES'], wrap=True)
         yield Footer()        
     def on_mount(self) -> None:
         self.query_one(DirectoryTree).focus()
@@ -166,36 +361,84 @@ class LogScreen(Screen):
         with Container():
             yield FilteredDirectoryTree(path, id="logtree-view")
             with Vertical(id="center-container"):
-                with VerticalScroll(id="code-log-view"):                    
-                    # with Horizontal(id="button-view"):
-                    #     yield Button("Refresh", id="refresh", variant="success")
-                    yield Static(id="log-code", expand=True)
+                # with Horizontal(id="button-view"):
+                #     yield Button("Refresh", id="refresh", variant="success")
+                yield Input(placeholder="Search logs, e.g. level:error days:7 session:<id> ETH-USDT", id="log-search")
+                yield DataTable(id="search-results", cursor_type="row")
+                yield LogFileView(id="log-code")
                     
         yield Footer()        
     def on_mount(self) -> None:
         self.query_one(DirectoryTree).focus()
+        self.search_results = []
+        table = self.query_one("#search-results", DataTable)
+        table.add_columns("Time", "Level", "Session", "Message")
+        table.display = False
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input.id == "log-search":
+            self.sub_title = f"Searching {event.value}"
+            self.search_logs(event.value)
+
+    @work(thread=True, exclusive=True, group="log-search", exit_on_error=False)
+    def search_logs(self, query: str) -> None:
+        from jesselivecli.logsearch import LogSearchIndex
+
+        index = LogSearchIndex("./logs")
+        try:
+            started = time.perf_counter()
+            added = index.update()
+            indexed = time.perf_counter()
+            results = index.query(query)
+            searched = time.perf_counter()
+        except Exception as e:
+            self.app.call_from_thread(self.notify, f"Search failed: {e}", severity="error")
+            return
+        finally:
+            index.close()
+        status = (f"{len(results)} lines in {(searched - indexed) * 1000:.0f} ms, "
+                  f"{added} new lines indexed in {(indexed - started) * 1000:.0f} ms")
+        self.app.call_from_thread(self.show_search_results, results, status)
+
+    def show_search_results(self, results: List[Dict], status: str) -> None:
+        self.search_results = results
+        table = self.query_one("#search-results", DataTable)
+        table.clear()
+        for number, result in enumerate(results):
+            date = datetime.fromtimestamp(result['ts']).strftime("%Y-%m-%d %H:%M:%S")
+            table.add_row(date, result['level'] or "", result['session'] or "", result['message'], key=str(number))
+        table.display = bool(results)
+        self.sub_title = status
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        if event.data_table.id != "search-results":
+            return
+        result = self.search_results[int(event.row_key.value)]
+        if result['path'].endswith(".gz"):
+            self.notify(f"Line {result['line'] + 1} of {result['path']}, compressed files can't be opened here")
+            return
+        self.open_log(result['path'], result['line'])
+
+    def on_screen_resume(self) -> None:
+        # a file picked in the home screen's tree
+        path = getattr(self.app, "log_path", None)
+        if path is not None:
+            self.app.log_path = None
+            self.open_log(path)
 
     def on_directory_tree_file_selected(
         self, event: DirectoryTree.FileSelected
     ) -> None:
         event.stop()
-        code_view = self.query_one("#log-code", Static)
+        self.open_log(event.path)
+        self.send_file_path_to_main_app(event)
+
+    def open_log(self, path, line: Optional[int] = None) -> None:
         try:
-            syntax = Syntax.from_path(
-                str(event.path),
-                line_numbers=True,
-                word_wrap=True,
-                indent_guides=True,
-                theme="github-dark",
-            )
-            self.send_file_path_to_main_app(event)
-        except Exception:
-            code_view.update(Traceback(theme="github-dark", width=None))
+            self.query_one("#log-code", LogFileView).open(path, line)
+        except Exception as e:
+            self.notify(f"Can't open {path}: {e}", severity="error")
             self.sub_title = "ERROR"
-        else:
-            code_view.update(syntax)
-            self.query_one("#code-log-view").scroll_home(animate=True)
-            self.sub_title = str(event.path)
             
     def send_file_path_to_main_app(self, event: DirectoryTree.FileSelected) -> None:
         self.post_message(RouteSelectMessage(self, event.path))
@@ -210,6 +453,8 @@ class HomeScreen(Screen):
     show_tree = var(True)
     def on_screen_resume(self) -> None:
         self.app.mode = "home"
+        for pane in self.query(LogPane):
+            pane.sync()
     def on_screen_suspend(self) -> None:
         self.app.mode = ""
         
@@ -231,20 +476,20 @@ class HomeScreen(Screen):
                             yield Label("Session id: ", id="session-id")
                         yield Button("Save Session", id="save", variant="success")                        
                     yield Label("Routes")
-                    yield DataTable(id="route-info")
+                    yield KeyedTable(id="route-info")
                     yield Label("Candles")
-                    yield DataTable(id="candle-info")
+                    yield KeyedTable(id="candle-info")
                     yield Label("Positions")
-                    yield DataTable(id="position-info")
+                    yield KeyedTable(id="position-info")
                     yield Label("Orders")
-                    yield DataTable(id="order-info")
+                    yield KeyedTable(id="order-info")
                     yield Label("LOG", id="error")
                     with VerticalScroll(id="code-view"):
-                        yield Static(id="code", expand=True)
+                        yield LogPane(id="code", max_lines=get_default_config()['DEFAULT_LOG_LINES'], wrap=True)
                     yield Label("Overview", id="overview")
-                    yield DataTable(id="general-info")
+                    yield KeyedTable(id="general-info")
                     yield Label("Watch List")
-                    yield DataTable(id="watch-list")
+                    yield KeyedTable(id="watch-list")
         yield Footer()        
         
     def on_mount(self) -> None:
@@ -275,22 +520,9 @@ class HomeScreen(Screen):
         self, event: DirectoryTree.FileSelected
     ) -> None:
         event.stop()
-        code_view = self.query_one("#code", Static)
-        try:
-            syntax = Syntax.from_path(
-                str(event.path),
-                line_numbers=True,
-                word_wrap=False,
-                indent_guides=True,
-                theme="github-dark",
-            )
-        except Exception:
-            code_view.update(Traceback(theme="github-dark", width=None))
-            self.sub_title = "ERROR"
-        else:
-            code_view.update(syntax)
-            self.query_one("#code-view").scroll_home(animate=False)
-            self.sub_title = str(event.path)
+        # files open in the log screen's pager, the log pane keeps following the session
+        self.app.log_path = event.path
+        self.app.switch_mode("log")
     
     def watch_show_tree(self, show_tree: bool) -> None:
         """Called when show_tree is modified."""
@@ -0,0 +1,298 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from hashlib import sha256
+from typing import Dict, List, Optional
+
+SYMBOLS = [
+    "BTC-USDT", "ETH-USDT", "SOL-USDT", "BNB-USDT", "XRP-USDT", "ADA-USDT", "DOGE-USDT", "AVAX-USDT",
+    "DOT-USDT", "LINK-USDT", "LTC-USDT", "ATOM-USDT", "NEAR-USDT", "APT-USDT", "ARB-USDT", "OP-USDT",
+]
+EXCHANGE = "Binance Perpetual Futures"
+
+
+class SimulatedSession:
+    """A synthetic live session producing frames shaped like the ones Jesse sends."""
+
+    def __init__(self, session_id: str, routes: List[Dict], symbols: List[str], orders: int = 20,
+                 log_burst: int = 10, paper_mode: bool = True, stamp: bool = False):
+        self.id = session_id
+        self.stamp = stamp
+        self.routes = routes
+        self.symbols = symbols
+        self.order_count = orders
+        self.log_burst = log_burst
+        self.mode = "papertrade" if paper_mode else "livetrade"
+        self.started_at = int(time.time() * 1000)
+        self.prices = {symbol: random.uniform(1, 50000) for symbol in symbols}
+        self.tick = 0
+        self.info_logs = 0
+        self.error_logs = 0
+
+    def frame(self, event: str, data) -> str:
+        if self.stamp:
+            # send time first, so load test clients can read it without decoding the frame
+            return json.dumps({"sent_at": time.time(), "id": self.id, "event": f"{self.mode}.{event}", "data": data})
+        return json.dumps({"id": self.id, "event": f"{self.mode}.{event}", "data": data})
+
+    def walk(self) -> None:
+        for symbol in self.prices:
+            self.prices[symbol] *= 1 + random.gauss(0, 0.001)
+
+    def candles(self) -> Dict:
+        candles = {}
+        for symbol, price in self.prices.items():
+            open_price = price * (1 + random.gauss(0, 0.002))
+            candles[f"{EXCHANGE}-{symbol}"] = {
+                "open": open_price,
+                "close": price,
+                "high": max(open_price, price) * 1.001,
+                "low": min(open_price, price) * 0.999,
+                "volume": random.uniform(0, 1000),
+            }
+        return candles
+
+    def positions(self) -> List[Dict]:
+        positions = []
+        for route in self.routes:
+            price = self.prices.get(route["symbol"], 1)
+            entry = price * 0.99
+            positions.append({
+                "symbol": route["symbol"],
+                "strategy_name": route["strategy"],
+                "leverage": 1,
+                "type": "long",
+                "qty": 1.0,
+                "entry": entry,
+                "current_price": price,
+                "pnl": price - entry,
+                "pnl_perc": (price - entry) / entry * 100,
+            })
+        return positions
+
+    def orders(self) -> List[Dict]:
+        """Open orders keep their price and creation time, one order is replaced every tick."""
+        if not hasattr(self, "open_orders"):
+            self.open_orders = [self.new_order(i) for i in range(self.order_count)]
+        elif self.open_orders:
+            i = self.tick % len(self.open_orders)
+            self.open_orders[i] = self.new_order(self.tick * self.order_count + i)
+        return list(self.open_orders)
+
+    def new_order(self, number: int) -> Dict:
+        symbol = self.symbols[number % len(self.symbols)]
+        return {
+            "id": f"{self.id}-{number}",
+            "symbol": symbol,
+            "type": "LIMIT",
+            "side": "buy" if number % 2 == 0 else "sell",
+            "qty": 1.0,
+            "price": self.prices[symbol],
+            "status": "ACTIVE",
+            "created_at": int(time.time() * 1000),
+        }
+
+    def general_info(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "current_time": int(time.time() * 1000),
+            "started_balance": 10000,
+            "current_balance": round(10000 + random.gauss(0, 100), 2),
+            "count_winning_trades": self.tick // 50,
+            "count_trades": self.tick // 30,
+            "pnl": round(random.gauss(0, 100), 2),
+            "pnl_perc": round(random.gauss(0, 1), 2),
+            "debug_mode": False,
+            "paper_mode": self.mode == "papertrade",
+            "count_info_logs": self.info_logs,
+            "count_error_logs": self.error_logs,
+            "routes": self.routes,
+        }
+
+    def watch_list(self) -> List:
+        return [[symbol, f"{price:.2f}"] for symbol, price in list(self.prices.items())[:10]]
+
+    def next_frames(self) -> List[str]:
+        """Frames for one tick: every snapshot event, with a burst of log lines every 10 ticks."""
+        self.tick += 1
+        self.walk()
+        frames = [
+            self.frame("current_candles", self.candles()),
+            self.frame("positions", self.positions()),
+            self.frame("orders", self.orders()),
+            self.frame("general_info", self.general_info()),
+            self.frame("watch_list", self.watch_list()),
+        ]
+        if self.tick % 10 == 0:
+            now = int(time.time() * 1000)
+            for i in range(self.log_burst):
+                self.info_logs += 1
+                frames.append(self.frame("info_log", {"message": f"tick {self.tick} log line {i}", "timestamp": now}))
+            if self.tick % 100 == 0:
+                self.error_logs += 1
+                frames.append(self.frame("error_log", {"message": f"simulated error at tick {self.tick}", "timestamp": now}))
+        return frames
+
+    def termination(self) -> str:
+        return self.frame("termination", {"message": "Session terminated"})
+
+
+class JesseSimulator:
+    """
+    Serves the Jesse REST endpoints used by jesse-live-cli and the /ws stream,
+    with synthetic sessions instead of real strategies.
+    """
+
+    def __init__(self, password: str = "test", routes: int = 2, symbols: int = 4, rate: float = 1.0,
+                 orders: int = 20, log_burst: int = 10, stamp: bool = False):
+        self.token = sha256(password.encode('utf-8')).hexdigest()
+        self.route_count = routes
+        self.symbol_count = symbols
+        self.rate = rate
+        self.order_count = orders
+        self.log_burst = log_burst
+        self.stamp = stamp
+        self.sessions = {}
+        self.tasks = {}
+        self.clients = set()
+        self.sent = 0
+
+    def make_routes(self) -> List[Dict]:
+        return [
+            {"exchange": EXCHANGE, "symbol": SYMBOLS[i % len(SYMBOLS)], "timeframe": "1m", "strategy": f"Strategy{i}"}
+            for i in range(self.route_count)
+        ]
+
+    def start_session(self, session_id: Optional[str] = None, routes: Optional[List[Dict]] = None,
+                      paper_mode: bool = True) -> SimulatedSession:
+        session_id = session_id or str(uuid.uuid4())
+        routes = routes or self.make_routes()
+        symbols = [route["symbol"] for route in routes]
+        symbols += [s for s in SYMBOLS if s not in symbols][:max(self.symbol_count - len(symbols), 0)]
+        session = SimulatedSession(session_id, routes, symbols, self.order_count, self.log_burst, paper_mode, self.stamp)
+        self.sessions[session_id] = session
+        self.tasks[session_id] = asyncio.create_task(self.run_session(session))
+        print(f"Started simulated session {session_id}")
+        return session
+
+    async def stop_session(self, session_id: str) -> bool:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.tasks.pop(session_id).cancel()
+        await self.broadcast([session.termination()])
+        print(f"Stopped simulated session {session_id}")
+        return True
+
+    async def run_session(self, session: SimulatedSession):
+        interval = 1 / self.rate
+        while True:
+            await self.broadcast(session.next_frames())
+            await asyncio.sleep(interval)
+
+    async def broadcast(self, frames: List[str]):
+        for ws in list(self.clients):
+            try:
+                for frame in frames:
+                    await ws.send_str(frame)
+                self.sent += len(frames)
+            except Exception:
+                self.clients.discard(ws)
+
+    def authorized(self, request) -> bool:
+        return request.headers.get('Authorization') == self.token
+
+    def make_app(self):
+        from aiohttp import web
+
+        def json_response(data, status=200):
+            return web.json_response(data, status=status)
+
+        def unauthorized():
+            return json_response({"message": "Invalid password"}, 401)
+
+        async def live(request):
+            if not self.authorized(request):
+                return unauthorized()
+            body = await request.json()
+            session_id = body.get("id")
+            if session_id in self.sessions:
+                return json_response({"message": "Session is already running"}, 409)
+            self.start_session(session_id, body.get("routes"), body.get("paper_mode", True))
+            return json_response({"message": "Started paper trading..."}, 202)
+
+        async def cancel_live(request):
+            if not self.authorized(request):
+                return unauthorized()
+            body = await request.json()
+            if not await self.stop_session(body.get("id")):
+                return json_response({"message": "Session not found"}, 404)
+            return json_response({"message": "Live process with ID " + body.get("id") + " terminated."}, 202)
+
+        async def active_workers(request):
+            if not self.authorized(request):
+                return unauthorized()
+            return json_response({"data": list(self.sessions)})
+
+        async def exchange_api_keys(request):
+            if not self.authorized(request):
+                return unauthorized()
+            return json_response({"data": [{"id": "exchange_api_key_id", "exchange": EXCHANGE, "name": "simulated"}]})
+
+        async def notification_api_keys(request):
+            if not self.authorized(request):
+                return unauthorized()
+            return json_response({"data": [{"id": "notification_api_key_id", "driver": "telegram", "name": "simulated"}]})
+
+        async def get_config(request):
+            if not self.authorized(request):
+                return unauthorized()
+            return json_response({"data": {"live": {"persistency": True}}})
+
+        async def shutdown(request):
+            if not self.authorized(request):
+                return unauthorized()
+            for session_id in list(self.sessions):
+                await self.stop_session(session_id)
+            return json_response({"message": "Shutting down..."})
+
+        async def websocket(request):
+            if request.query.get("token") != self.token:
+                return unauthorized()
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            self.clients.add(ws)
+            try:
+                async for _ in ws:
+                    pass  # commands like "join" are accepted and ignored
+            finally:
+                self.clients.discard(ws)
+            return ws
+
+        app = web.Application()
+        app.router.add_post('/live', live)
+        app.router.add_post('/cancel-live', cancel_live)
+        app.router.add_post('/active-workers', active_workers)
+        app.router.add_get('/exchange-api-keys', exchange_api_keys)
+        app.router.add_get('/notification-api-keys', notification_api_keys)
+        app.router.add_post('/get-config', get_config)
+        app.router.add_post('/shutdown', shutdown)
+        app.router.add_get('/ws', websocket)
+        return app
+
+    async def serve(self, host: str = "localhost", port: int = 9000, sessions: int = 1):
+        from aiohttp import web
+
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        for _ in range(sessions):
+            self.start_session()
+        print(f"Jesse simulator listening on {host}:{port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
@@ -1,13 +1,155 @@
-from typing import List, Dict
+from typing import List, Dict, Iterable, Tuple
+from collections import OrderedDict, deque
+from itertools import accumulate, islice
+from array import array
+import copy
+import mmap
+import os
 import pathlib
+import re
 import yaml
 import json
-import arrow
 from hashlib import sha256
 from datetime import datetime
-import pytz
 from jesselivecli.config import get_default_config  # Import the default timezone
 
+try:
+    from orjson import loads  # faster JSON decoding when installed
+except ImportError:
+    from json import loads
+
+# "id" / "event" string fields of a frame envelope, searched before the "data" body
+ENVELOPE_FIELD = re.compile(r'"(id|event)"\s*:\s*"([^"\\]*)"')
+
+def peek_envelope(message: str) -> Tuple[str, str]:
+    """
+    Return the (id, event) of a Jesse frame without decoding its data.
+    Only the text before the "data" field is scanned; frames laid out
+    differently are fully decoded. Raises like json.loads / a missing key would.
+    """
+    head = message[:message.find('"data"')] if message.startswith('{') else ''
+    if '\\' not in head:
+        fields = dict(ENVELOPE_FIELD.findall(head))
+        if 'id' in fields and 'event' in fields:
+            return fields['id'], fields['event']
+    data = loads(message)
+    return data['id'], data['event']
+
+class LogBuffer:
+    """Bounded ring buffer of log lines, numbered so views only append the lines they haven't shown yet."""
+
+    def __init__(self, max_lines: int = 1000):
+        self.lines = deque(maxlen=max_lines)
+        self.count = 0
+
+    def append(self, line) -> None:
+        self.lines.append(line)
+        self.count += 1
+
+    def since(self, shown: int) -> List:
+        """Lines added after the first `shown` ones, limited to what is still retained."""
+        missing = self.count - shown
+        if missing <= 0:
+            return []
+        return list(islice(self.lines, max(len(self.lines) - missing, 0), None))
+
+class LineIndex:
+    """
+    Start offsets of the lines of a file read through a memory map, so any
+    line can be read without loading the file. `index_chunk` extends the index
+    a chunk at a time (safe to run in a worker thread), `refresh` picks up
+    appended data and starts over when the file was truncated or replaced.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 4 * 1024 * 1024):
+        self.path = str(path)
+        self.chunk_size = chunk_size
+        self.file = None
+        self.open()
+
+    def open(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, "rb")
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.map = None
+        self.size = 0
+        self.offsets = array("Q", [0])
+        self.indexed = 0
+        self.refresh()
+
+    def close(self) -> None:
+        self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def refresh(self) -> bool:
+        """Map the data appended since the last call, True when the file changed."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if stat.st_ino != self.inode or stat.st_size < self.indexed:
+            self.open()  # rotated or truncated
+            return True
+        if stat.st_size == self.size:
+            return False
+        # a new map of the longer file, readers of the old one keep their reference
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.map)
+        return True
+
+    @property
+    def complete(self) -> bool:
+        return self.indexed >= self.size
+
+    @property
+    def progress(self) -> float:
+        return self.indexed / self.size if self.size else 1.0
+
+    def index_chunk(self) -> bool:
+        """Index up to `chunk_size` more bytes, False when everything mapped is indexed."""
+        if self.complete:
+            return False
+        start = self.indexed
+        end = min(start + self.chunk_size, self.size)
+        parts = self.map[start:end].split(b"\n")
+        # each newline starts a line, the part after the last one is still incomplete
+        self.offsets.extend(islice(accumulate((len(part) + 1 for part in parts[:-1]), initial=start), 1, None))
+        self.indexed = end
+        return not self.complete
+
+    @property
+    def line_count(self) -> int:
+        """Lines indexed so far, counting an unterminated last line."""
+        return len(self.offsets) if self.indexed > self.offsets[-1] else len(self.offsets) - 1
+
+    def line_span(self, number: int) -> Tuple[int, int]:
+        start = self.offsets[number]
+        end = self.offsets[number + 1] - 1 if number + 1 < len(self.offsets) else self.indexed
+        return start, end
+
+    def line(self, number: int) -> str:
+        start, end = self.line_span(number)
+        return self.map[start:end].decode("utf-8", "replace").rstrip("\r")
+
+    def tail(self, count: int) -> List[str]:
+        """Last `count` lines of the file, found from its end without the index."""
+        data = self.map
+        if data is None:
+            return []
+        end = len(data)
+        if end and data[end - 1:end] == b"\n":
+            end -= 1
+        lines = []
+        while len(lines) < count and end > 0:
+            start = data.rfind(b"\n", 0, end) + 1
+            lines.append(data[start:end].decode("utf-8", "replace").rstrip("\r"))
+            end = start - 1
+        lines.reverse()
+        return lines
+
 def load_config(config_filename: str) -> Dict:
     str_filename = str(config_filename)
     cfg_file = pathlib.Path(config_filename)
@@ -28,23 +170,80 @@ def load_config(config_filename: str) -> Dict:
         print(f"Error loading configuration file {cfg_file}: {e}")
         return None  # Return None if there's an error loading the file
 
+_configs = {}
+
+def cached_config(config_filename: str) -> Dict:
+    """load_config, parsed again only when the file's mtime or size changes. Returns a copy."""
+    try:
+        stat = os.stat(config_filename)
+    except OSError:
+        return load_config(config_filename)
+    key = os.path.abspath(config_filename)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _configs.get(key)
+    if cached is None or cached[0] != version:
+        cached = _configs[key] = (version, load_config(config_filename))
+    return copy.deepcopy(cached[1])
+
+def parse_timestamp(value: str) -> float:
+    """Parse epoch seconds / milliseconds or a local ISO date like '2024-05-01 12:30' into epoch seconds."""
+    try:
+        timestamp = float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+    return timestamp / 1000 if timestamp > 1e11 else timestamp
+
 def generate_ws_url(host: str, port: str, password: str) -> str:
     hashed_local_pass = sha256(password.encode('utf-8')).hexdigest()
     return f"ws://{host}:{port}/ws?token={hashed_local_pass}"    
             
-def timestamp_to_date(timestamp: int, timezone: str = None) -> str:
-    """Convert a timestamp to a formatted date string in the specified timezone."""
+class TimestampFormatter:
+    """
+    Format millisecond timestamps as date strings in one timezone. The
+    timezone is resolved once and formatted strings are cached per second,
+    keeping the `max_entries` most recently used ones.
+    """
+
+    def __init__(self, timezone: str = None, max_entries: int = 4096, fmt: str = '%Y-%m-%d %H:%M:%S %Z%z'):
+        import pytz
+
+        if timezone is None:
+            timezone = get_default_config()['DEFAULT_TIMEZONE']
+        self.timezone = pytz.timezone(timezone)
+        self.max_entries = max_entries
+        self.fmt = fmt
+        self.cache = OrderedDict()
+
+    def format(self, timestamp) -> str:
+        second = int(timestamp) // 1000
+        text = self.cache.get(second)
+        if text is not None:
+            self.cache.move_to_end(second)
+            return text
+        text = datetime.fromtimestamp(second, self.timezone).strftime(self.fmt)
+        self.cache[second] = text
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return text
+
+    def format_many(self, timestamps: Iterable) -> List[str]:
+        """Format a whole column of timestamps, each distinct second is formatted once."""
+        column = [int(timestamp) // 1000 for timestamp in timestamps]
+        texts = {}
+        for second in set(column):
+            texts[second] = self.format(second * 1000)
+        return [texts[second] for second in column]
+
+_formatters = {}
+
+def get_timestamp_formatter(timezone: str = None) -> TimestampFormatter:
+    """Shared formatter of a timezone, the default one if not given."""
     if timezone is None:
         timezone = get_default_config()['DEFAULT_TIMEZONE']
-    # Check if the timestamp is in milliseconds and convert to seconds
-    timestamp = int(timestamp) / 1000
-    
-    # Convert the timestamp to a datetime object
-    dt = datetime.utcfromtimestamp(timestamp).replace(tzinfo=pytz.utc)
-    
-    # Convert the datetime to the specified timezone
-    target_timezone = pytz.timezone(timezone)
-    dt = dt.astimezone(target_timezone)
-    
-    # Format the datetime as a string
-    return dt.strftime('%Y-%m-%d %H:%M:%S %Z%z')
\ No newline at end of file
+    if timezone not in _formatters:
+        _formatters[timezone] = TimestampFormatter(timezone)
+    return _formatters[timezone]
+
+def timestamp_to_date(timestamp: int, timezone: str = None) -> str:
+    """Convert a timestamp in milliseconds to a formatted date string in the specified timezone."""
+    return get_timestamp_formatter(timezone).format(timestamp)
@@ -0,0 +1,29 @@
+import asyncio
+
+from jesselivecli.api import JesseAPIError, wait_until_stopped
+
+
+class FlakyClient:
+    def __init__(self, replies):
+        self.replies = list(replies)
+
+    async def active_worker_ids(self):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_wait_until_stopped_keeps_polling_after_a_failed_reply():
+    client = FlakyClient([["route"], JesseAPIError("/active-workers returned 500"), []])
+
+    assert asyncio.run(wait_until_stopped(client, "route", poll_interval=0, timeout=5))
+    assert client.replies == []
+
+
+def test_wait_until_stopped_gives_up_at_the_timeout_when_every_poll_fails():
+    class Down:
+        async def active_worker_ids(self):
+            raise JesseAPIError("/active-workers returned 502")
+
+    assert not asyncio.run(wait_until_stopped(Down(), "route", poll_interval=0.01, timeout=0.05))
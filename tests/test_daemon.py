@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from jesselivecli.daemon import SessionWatcher
+
+
+class FakeClient:
+    def __init__(self, workers):
+        self.workers = workers
+        self.release = None
+
+    async def active_worker_ids(self):
+        if self.release is not None:
+            await self.release.wait()
+        return list(self.workers)
+
+
+def frame(session_id, event):
+    return json.dumps({"id": session_id, "event": f"papertrade.{event}", "data": {}})
+
+
+def test_quiet_sessions_stay_active_until_they_terminate():
+    async def run():
+        watcher = SessionWatcher("main", "ws://unused", FakeClient(["quiet", "busy"]))
+        assert not watcher.ready
+
+        await watcher.resync()
+        watcher.observe(frame("busy", "termination"))
+        watcher.observe(frame("new", "positions"))
+
+        assert watcher.ready
+        assert watcher.active_sessions() == ["new", "quiet"]
+
+    asyncio.run(run())
+
+
+def test_resync_keeps_the_frames_seen_while_it_waits():
+    async def run():
+        client = FakeClient(["ending"])
+        client.release = asyncio.Event()
+        watcher = SessionWatcher("main", "ws://unused", client)
+
+        resync = asyncio.create_task(watcher.resync())
+        await asyncio.sleep(0)
+        watcher.observe(frame("ending", "unexpectedTermination"))
+        watcher.observe(frame("started", "info_log"))
+        client.release.set()
+        await resync
+
+        assert watcher.active_sessions() == ["started"]
+
+    asyncio.run(run())
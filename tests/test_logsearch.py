@@ -0,0 +1,30 @@
+import json
+from datetime import datetime
+
+from click.testing import CliRunner
+
+from jesselivecli import cli
+from jesselivecli.logsearch import parse_query
+
+
+def test_parse_query_keeps_quoted_values_whole():
+    text, filters = parse_query('level:error since:"2024-05-01 12:30" until:"2024-05-02" "stop loss" ETH-USDT')
+
+    assert filters == {"level": "error", "since": "2024-05-01 12:30", "until": "2024-05-02"}
+    assert text == "stop loss ETH-USDT"
+
+
+def test_search_since_option_takes_a_date_with_a_time(tmp_path):
+    session = tmp_path / "session-0"
+    session.mkdir()
+    with open(session / "log.jsonl", "w") as file:
+        for hour in range(10, 15):
+            ts = datetime(2024, 5, 1, hour, 0).timestamp()
+            file.write(json.dumps({"ts": ts, "level": "info", "session": "session-0", "message": f"stop at {hour}"}) + "\n")
+
+    result = CliRunner().invoke(cli, ["search", "stop", "--log_dir", str(tmp_path), "--json",
+                                      "--since", "2024-05-01 11:30", "--until", "2024-05-01 13:30"])
+
+    assert result.exit_code == 0, result.output
+    messages = [json.loads(line)["message"] for line in result.output.splitlines()]
+    assert messages == ["stop at 13", "stop at 12"]
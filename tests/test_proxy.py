@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import pytest
+
+from jesselivecli.proxy import (CONFLATE, DISCONNECT, DROP_OLDEST, SNAPSHOT_EVENTS, ProxyClient, SessionCache, frame_key,
+                                load_upstreams, tag_origin)
+
+
+class FakeWebsocket:
+    remote_address = ("127.0.0.1", 1234)
+
+    async def send(self, message):
+        pass
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def frame(session_id, event, data=None):
+    return json.dumps({"id": session_id, "event": f"papertrade.{event}", "data": data or {}})
+
+
+def busy_cache(sessions=10, log_tail=100):
+    cache = SessionCache(log_tail)
+    for i in range(sessions):
+        session_id = f"session-{i}"
+        for event in SNAPSHOT_EVENTS:
+            message = frame(session_id, event)
+            cache.update(message, frame_key(message))
+        for n in range(log_tail):
+            message = frame(session_id, "info_log", {"message": f"line {n}"})
+            cache.update(message, frame_key(message))
+    return cache
+
+
+def queued(client):
+    return [client.latest[key] if message is None else message for key, message in client.pending]
+
+
+@pytest.mark.parametrize("policy", [DROP_OLDEST, DISCONNECT, CONFLATE])
+def test_replay_keeps_every_snapshot_of_a_busy_cache(policy):
+    async def run():
+        client = ProxyClient(FakeWebsocket(), max_queue=1000, policy=policy)
+        client.replay(busy_cache().frames())
+        keys = [frame_key(message) for message in queued(client)]
+        snapshots = [key for key in keys if key[1] in SNAPSHOT_EVENTS]
+        logs = [key for key in keys if key[1] == "info_log"]
+
+        assert not client.closed
+        assert client.dropped == 0
+        assert len(snapshots) == 10 * len(SNAPSHOT_EVENTS)
+        assert client.backlog <= client.max_queue
+        # half of the room left goes to the newest log lines, conflated snapshots take none
+        assert len(logs) == (1000 - (0 if policy == CONFLATE else len(snapshots))) // 2
+        assert json.loads(queued(client)[-1])["data"]["message"] == "line 99"
+
+        # live frames still fit while the replay drains
+        for n in range(100):
+            client.enqueue(frame("session-0", "info_log", {"message": f"live {n}"}), ("session-0", "info_log"))
+        assert not client.closed
+        assert client.dropped == 0
+
+    asyncio.run(run())
+
+
+def test_replay_respects_subscriptions():
+    async def run():
+        client = ProxyClient(FakeWebsocket(), max_queue=1000)
+        client.subscribe(["session-1"], ["orders", "info_log"])
+        client.replay(busy_cache().frames())
+        keys = {frame_key(message) for message in queued(client)}
+        assert keys == {("session-1", "orders"), ("session-1", "info_log")}
+
+    asyncio.run(run())
+
+
+def test_conflate_keeps_the_newest_snapshot_under_log_pressure():
+    async def run():
+        client = ProxyClient(FakeWebsocket(), max_queue=3, policy=CONFLATE)
+        for n in range(3):
+            message = frame("session-0", "positions", {"n": n})
+            client.enqueue(message, frame_key(message))
+            message = frame("session-0", "info_log", {"message": f"line {n}"})
+            client.enqueue(message, frame_key(message))
+
+        assert client.dropped == 0 and not client.closed
+        assert [json.loads(message)["data"] for message in queued(client)] == [
+            {"n": 2}, {"message": "line 0"}, {"message": "line 1"}, {"message": "line 2"}]
+
+        # past max_queue log frames the client is disconnected rather than skip one
+        message = frame("session-0", "info_log", {"message": "line 3"})
+        client.enqueue(message, frame_key(message))
+        assert client.closed
+
+    asyncio.run(run())
+
+
+def test_same_session_on_two_servers_is_cached_and_conflated_apart():
+    async def run():
+        cache = SessionCache()
+        client = ProxyClient(FakeWebsocket(), policy=CONFLATE)
+        for server in ("main", "main-2"):
+            message = tag_origin(frame("session-0", "positions", {"server": server}), server)
+            cache.update(message, frame_key(message))
+            client.enqueue(message, frame_key(message))
+
+        assert [key for _, key in cache.frames("session-0")] == [("session-0", "positions", "main"),
+                                                                 ("session-0", "positions", "main-2")]
+        assert [json.loads(message)["server"] for message in queued(client)] == ["main", "main-2"]
+
+    asyncio.run(run())
+
+
+def test_upstreams_with_the_same_name_are_kept_apart(tmp_path):
+    configs = []
+    for port in (9000, 9001):
+        path = tmp_path / f"server-{port}.yml"
+        path.write_text(f"server:\n  name: main\n  host: localhost\n  port: {port}\n  password: test\n")
+        configs.append(str(path))
+
+    upstreams = load_upstreams(configs + [configs[0]])
+
+    assert [name for name, _ in upstreams] == ["main", "main-2"]
+    assert ":9000/" in upstreams[0][1] and ":9001/" in upstreams[1][1]
+
+
+def test_session_cache_keeps_snapshots_within_max_bytes():
+    cache = SessionCache(log_tail=100, max_bytes=2000)
+    for n in range(20):
+        message = frame("session-0", "info_log", {"message": f"line {n}"})
+        cache.update(message, frame_key(message))
+    small = frame("session-0", "orders", ["x" * 100])
+    cache.update(small, frame_key(small))
+    large = frame("session-0", "orders", ["x" * 5000])
+    cache.update(large, frame_key(large))
+    positions = frame("session-0", "positions", ["x" * 1500])
+    cache.update(positions, frame_key(positions))
+
+    cached = [message for message, _ in cache.frames()]
+    assert small not in cached and large not in cached
+    assert cached[0] == positions
+    assert sum(map(len, cached)) <= 2000
+    assert cache.sizes[("session-0",)] == sum(map(len, cached))